@@ -0,0 +1,3 @@
+"""
+    Benchmarks of the cube package, run with: python -m benchmarks
+"""
@@ -0,0 +1,187 @@
+"""
+    Reproducible benchmarks of the cube package
+
+    python -m benchmarks [--seed 0] [--cubes 200] [--moves 20000]
+                         [--repeat 5] [--solve-repeat 3] [--method cfop]
+                         [--output results.json]
+                         [--compare baseline.json] [--tolerance 0.2]
+
+    Measures the move throughput of every Cube turn method, the cost of
+    generate_random_cube, the latency percentiles, solution lengths and
+    peak memory of solve() over a seeded corpus of random cubes, after a
+    warm up solve and with the best of repeated runs, so two runs of the
+    same code agree within the default tolerance.
+    The results are printed (or written to --output) as JSON, so two runs
+    can be compared before and after a change: with --compare the exit
+    status is 1 when a metric is worse than the baseline by more than
+    --tolerance (relative).
+"""
+
+import argparse
+import json
+import platform
+import sys
+import tracemalloc
+from time import perf_counter, strftime
+
+from cube import Cube
+from cube.cubie import random_states
+
+
+TURNS = ['F', 'F_', 'U', 'U_', 'L', 'L_', 'R', 'R_', 'D', 'D_', 'B', 'B_']
+
+
+def percentiles(values, points=(50, 90, 99)):
+    values = sorted(values)
+    result = {f'p{p}': values[min(len(values) - 1, len(values) * p // 100)] for p in points}
+    result['min'] = values[0]
+    result['max'] = values[-1]
+    result['mean'] = sum(values) / len(values)
+    return result
+
+
+def best_rate(func, n, repeat):
+    """
+    Calls per second of func, best of repeat runs of n calls
+    """
+    best = None
+    for r in range(repeat):
+        start = perf_counter()
+        for i in range(n):
+            func()
+        elapsed = perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return n / best
+
+
+def bench_moves(n, repeat):
+    """
+    Moves per second of every turn method, and their median
+    (the one compared, a single turn method is too noisy)
+    """
+    rates = {name: best_rate(Cube().dire[name], n, repeat) for name in TURNS}
+    rates['median'] = percentiles(list(rates.values()))['p50']
+    return rates
+
+
+def bench_random(n, repeat):
+    return {'per_second': best_rate(Cube().generate_random_cube, n, repeat)}
+
+
+def bench_solve(states, method, repeat):
+    """
+    Latency, solution length and peak memory of every solve,
+    the latency of a cube is the best of repeat solves
+    """
+    if method == 'two_phase':
+        from cube.two_phase import Search
+        start = perf_counter()
+        Search()
+        tables = perf_counter() - start
+    else:
+        tables = 0.0
+    # warm up: the lazily built tables (cube.f2l, ...) are not timed
+    cube = Cube()
+    cube.state = states[0]
+    start = perf_counter()
+    cube.solve(method=method)
+    warmup = perf_counter() - start
+    times = [None] * len(states)
+    lengths = []
+    for r in range(repeat):
+        for i, state in enumerate(states):
+            cube = Cube()
+            cube.state = state
+            start = perf_counter()
+            cube.solve(method=method)
+            elapsed = perf_counter() - start
+            if times[i] is None or elapsed < times[i]:
+                times[i] = elapsed
+            if r == 0:
+                lengths.append(len(cube.rotates))
+    memory = []
+    for state in states:
+        cube = Cube()
+        cube.state = state
+        tracemalloc.start()
+        cube.solve(method=method)
+        memory.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    histogram = {}
+    for n in lengths:
+        histogram[n // 10 * 10] = histogram.get(n // 10 * 10, 0) + 1
+    return {'tables_seconds': tables,
+            'warmup_seconds': warmup,
+            'latency_seconds': percentiles(times),
+            'solves_per_second': len(times) / sum(times),
+            'length': percentiles(lengths),
+            'length_histogram': {f'{k}-{k + 9}': v for k, v in sorted(histogram.items())},
+            'peak_memory_bytes': percentiles(memory)}
+
+
+# (path in the results, True when higher is better), the stable metrics:
+# p99 and max of 200 latencies, or a single turn method, vary too much between runs
+METRICS = [(('moves_per_second', 'median'), True),
+           (('generate_random_cube', 'per_second'), True),
+           (('solve', 'solves_per_second'), True),
+           (('solve', 'latency_seconds', 'p90'), False),
+           (('solve', 'length', 'mean'), False),
+           (('solve', 'peak_memory_bytes', 'max'), False)]
+
+
+def compare(results, baseline, tolerance):
+    """
+    Relative change of every metric, and the metrics worse than tolerance
+    """
+    changes, regressions = {}, []
+    for path, higher in METRICS:
+        new, old = results, baseline
+        for key in path:
+            new, old = new[key], old[key]
+        change = (new - old) / old if old else 0.0
+        name = '.'.join(path)
+        changes[name] = change
+        if (-change if higher else change) > tolerance:
+            regressions.append(name)
+    return {'changes': changes, 'regressions': regressions}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__.split('\n')[1].strip())
+    parser.add_argument('--seed', type=int, default=0, help='seed of the corpus of cubes')
+    parser.add_argument('--cubes', type=int, default=200, help='number of cubes solved')
+    parser.add_argument('--moves', type=int, default=20000, help='calls of every turn method')
+    parser.add_argument('--repeat', type=int, default=5, help='runs of the throughput benchmarks (best is kept)')
+    parser.add_argument('--solve-repeat', type=int, default=3, help='solves of every cube (best is kept)')
+    parser.add_argument('--method', default='cfop', choices=['cfop', 'two_phase'])
+    parser.add_argument('--output', help='JSON file of the results (default: stdout)')
+    parser.add_argument('--compare', help='JSON file of a previous run')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative regression')
+    args = parser.parse_args(argv)
+
+    states = list(random_states(args.cubes, seed=args.seed))
+    results = {'meta': {'time': strftime('%Y-%m-%dT%H:%M:%S'),
+                        'python': platform.python_version(),
+                        'platform': platform.platform(),
+                        'args': vars(args)},
+               'moves_per_second': bench_moves(args.moves, args.repeat),
+               'generate_random_cube': bench_random(min(args.moves, 2000), args.repeat),
+               'solve': bench_solve(states, args.method, args.solve_repeat)}
+    if args.compare:
+        with open(args.compare) as f:
+            results['comparison'] = compare(results, json.load(f), args.tolerance)
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    if args.compare and results['comparison']['regressions']:
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
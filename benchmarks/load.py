@@ -0,0 +1,104 @@
+"""
+    Load test of the solve service (cube.service)
+
+    python -m benchmarks.load [--requests 2000] [--concurrency 64]
+                              [--connections 4] [--seed 0]
+                              [--port 8765 | --unix PATH] [--spawn]
+                              [--workers N] [--batch 32] [--delay 0.002]
+
+    Sends --requests seeded random cubes over --connections connections,
+    keeping --concurrency requests in flight, and prints the throughput
+    and the latency percentiles as JSON: of the solved requests, and
+    separately of the failed ones (timeouts, errors), which count too. With --spawn a server is started
+    in this process (with --workers, --batch, --delay), else the server
+    must already be running.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from time import perf_counter
+
+from cube.batch import METHODS
+from cube.cubie import random_states
+from cube.service import SolveClient, SolveServer
+
+from .__main__ import percentiles
+
+
+async def run(args):
+    server = None
+    if args.spawn:
+        server = SolveServer(args.workers, args.batch, args.delay, timeout=args.timeout, method=args.method)
+        await server.start(args.host, args.port, args.unix)
+    clients = [await SolveClient.connect(args.host, args.port, args.unix) for i in range(args.connections)]
+    states = list(random_states(args.requests, seed=args.seed))
+    latencies = []
+    failed = []
+    errors = {}
+    slots = asyncio.Semaphore(args.concurrency)
+
+    async def one(i, state):
+        async with slots:
+            start = perf_counter()
+            try:
+                await clients[i % len(clients)].solve(state, args.method, args.timeout)
+            except RuntimeError as e:
+                errors[str(e)] = errors.get(str(e), 0) + 1
+                failed.append(perf_counter() - start)
+            else:
+                latencies.append(perf_counter() - start)
+
+    # warm up the workers (tables, imports) before measuring
+    await asyncio.gather(*(one(i, s) for i, s in enumerate(states[:args.concurrency])))
+    latencies.clear()
+    failed.clear()
+    errors.clear()
+    start = perf_counter()
+    await asyncio.gather(*(one(i, s) for i, s in enumerate(states)))
+    elapsed = perf_counter() - start
+    info = await clients[0].info()
+    for client in clients:
+        await client.close()
+    if server is not None:
+        await server.close()
+    return {
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+        'connections': args.connections,
+        'method': args.method,
+        'seconds': elapsed,
+        'throughput': len(latencies) / elapsed,
+        'latency': percentiles(latencies, (50, 90, 99, 999)) if latencies else None,
+        'failed': len(failed),
+        'failed_latency': percentiles(failed, (50, 90, 99, 999)) if failed else None,
+        'all_latency': percentiles(latencies + failed, (50, 90, 99, 999)) if latencies or failed else None,
+        'errors': errors,
+        'server': info,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.load', description='Load test of the solve service.')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=64, help='requests in flight')
+    parser.add_argument('--connections', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--method', default='cfop', choices=METHODS)
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', default=None)
+    parser.add_argument('--spawn', action='store_true', help='start a server in this process')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--batch', type=int, default=32)
+    parser.add_argument('--delay', type=float, default=0.002)
+    args = parser.parse_args(argv)
+    result = asyncio.run(run(args))
+    json.dump(result, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == '__main__':
+    main()
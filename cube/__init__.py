@@ -61,22 +61,176 @@
         -5: Rotate DOWN (Opposite of Green) side Anti Clockwise
         6: Rotate BACK (Opposite of White) side Clockwise
         -6: Rotate BACK (Opposite of White) side Anti Clockwise
+
+    The state of the cube is stored in a tuple of 54 colors (Cube.state),
+    facelet "side[i][j]" is at index 9 * FACES.index(side) + 3 * i + j.
+    Every move is a precomputed permutation of these indexes, so a move
+    is applied with a single gather (GATHER[move](state)).
+    Cube.cube gives the same state as a dict of six 3x3 lists.
+    The corner and edge views used by the solver (Cube.corners, Cube.centers,
+    ...) are rebuilt on demand, only when read after the state has changed.
 """
 
-from random import choice
+from operator import itemgetter
+from time import perf_counter
+import random
+
+
+FACES = 'FULRDB'
+
+SOLVED = tuple(i // 9 for i in range(54))
+
+CORNERS = {'FUL': (0, 15, 20), 'FUR': (2, 17, 27),
+           'FDL': (6, 36, 26), 'FDR': (8, 38, 33),
+           'BUL': (51, 9, 18), 'BUR': (53, 11, 29),
+           'BDL': (45, 42, 24), 'BDR': (47, 44, 35)}
+
+EDGES = {'FU': (1, 16), 'FL': (3, 23), 'FD': (7, 37), 'FR': (5, 30),
+         'BU': (52, 10), 'BL': (48, 21), 'BD': (46, 43), 'BR': (50, 32),
+         'UL': (12, 19), 'UR': (14, 28), 'DL': (39, 25), 'DR': (41, 34)}
+
+
+def permutation(*cycles):
+    """
+    Build a facelet permutation from cycles of facelet indexes,
+    the sticker at every index of a cycle moves to the next index
+    (new_state[i] = state[perm[i]])
+    """
+    perm = list(range(54))
+    for cycle in cycles:
+        for i, j in enumerate(cycle):
+            perm[cycle[(i + 1) % len(cycle)]] = j
+    return tuple(perm)
+
+
+def compose(*perms):
+    """
+    Single permutation doing the given permutations one after another
+    """
+    result = tuple(range(54))
+    for perm in perms:
+        result = tuple(result[i] for i in perm)
+    return result
+
+
+def inverse(perm):
+    """
+    Permutation undoing the given permutation
+    """
+    result = [0] * 54
+    for i, j in enumerate(perm):
+        result[j] = i
+    return tuple(result)
+
+
+MOVES = {'F': permutation((0, 2, 8, 6), (1, 5, 7, 3), (15, 27, 38, 26), (16, 30, 37, 23), (17, 33, 36, 20)),
+         'U': permutation((0, 18, 53, 27), (1, 19, 52, 28), (2, 20, 51, 29), (9, 11, 17, 15), (10, 14, 16, 12)),
+         'L': permutation((0, 36, 45, 9), (3, 39, 48, 12), (6, 42, 51, 15), (18, 20, 26, 24), (19, 23, 25, 21)),
+         'R': permutation((2, 11, 47, 38), (5, 14, 50, 41), (8, 17, 53, 44), (27, 29, 35, 33), (28, 32, 34, 30)),
+         'D': permutation((6, 33, 47, 24), (7, 34, 46, 25), (8, 35, 45, 26), (36, 38, 44, 42), (37, 41, 43, 39)),
+         'B': permutation((9, 24, 44, 29), (10, 21, 43, 32), (11, 18, 42, 35), (45, 47, 53, 51), (46, 50, 52, 48))}
+for _side in FACES:
+    MOVES[f'{_side}_'] = inverse(MOVES[_side])
+    MOVES[f'{_side}2'] = compose(MOVES[_side], MOVES[_side])
+
+GATHER = {k: itemgetter(*v) for k, v in MOVES.items()}
+CORNER_GATHER = {k: itemgetter(*v) for k, v in CORNERS.items()}
+EDGE_GATHER = {k: itemgetter(*v) for k, v in EDGES.items()}
+
+_macros = {}
+
+
+def macro(*moves):
+    """
+    Compile a sequence of moves ('F', 'R_', 'B2', ...) into a single
+    gather of the facelets and the entries it adds to Cube.rotates,
+    so Cube.apply() runs the whole sequence at the cost of one turn
+    (compiled once, later calls return the same macro)
+    """
+    if moves not in _macros:
+        _macros[moves] = build_macro(moves)
+    return _macros[moves]
+
+
+def build_macro(moves):
+    """
+    Macro of a sequence of moves, not cached (see macro())
+    """
+    rotates = []
+    for move in moves:
+        side = FACES.index(move[0]) + 1
+        rotates += [side] * 2 if move[-1] == '2' else [-side if move[-1] == '_' else side]
+    return itemgetter(*compose(*(MOVES[m] for m in moves))), tuple(rotates)
+
+
+# the algorithms of the last layer
+ORIENT_EDGES = macro('U', 'R', 'B', 'R_', 'B_', 'U_')
+PERMUTE_EDGES = macro('R', 'B', 'R_', 'B', 'R', 'B', 'B', 'R_')
+PERMUTE_CORNERS = macro('B', 'R', 'B_', 'L_', 'B', 'R_', 'B_', 'L')
+PERMUTE_CORNERS_TWICE = macro(*('B', 'R', 'B_', 'L_', 'B', 'R_', 'B_', 'L') * 2)
+ORIENT_CORNER_TWICE = macro(*('R_', 'F_', 'R', 'F') * 2)
+
+# axis of the sides in Cube.rotates (FRONT - BACK, UP - DOWN, LEFT - RIGHT)
+AXIS = {1: 0, 6: 0, 2: 1, 5: 1, 3: 2, 4: 2}
+
+
+def optimize_rotates(rotates):
+    """
+    Shortest equivalent of a solution (Cube.rotates):
+    turns of the same side are merged (modulo 4), also across turns of
+    the opposite side (they commute), which are put in a fixed order.
+    Merged turns are removed from a stack, so the cancellations they
+    expose are found in the same (linear time) pass.
+    """
+    out = []  # [side, quarter turns clockwise (1 ... 3)]
+    for r in rotates:
+        side, turns = abs(r), 1 if r > 0 else 3
+        axis = AXIS[side]
+        i = len(out) - 1
+        while i >= 0 and AXIS[out[i][0]] == axis and out[i][0] != side:
+            i -= 1
+        if i >= 0 and out[i][0] == side:
+            turns = (out[i][1] + turns) % 4
+            if turns:
+                out[i][1] = turns
+            else:
+                del out[i]
+        elif out and AXIS[out[-1][0]] == axis and out[-1][0] > side:
+            out.insert(len(out) - 1, [side, turns])
+        else:
+            out.append([side, turns])
+    result = []
+    for side, turns in out:
+        if turns == 3:
+            result.append(-side)
+        else:
+            result += [side] * turns
+    return result
+
+
+def to_notation(rotates, half_turns=True):
+    """
+    Standard notation of a solution (Cube.rotates): ['R', "U'", 'F2', ...],
+    two equal quarter turns are written as a half turn when half_turns is True
+    """
+    moves = []
+    for r in rotates:
+        name = FACES[abs(r) - 1]
+        if r < 0:
+            name += "'"
+        if half_turns and moves and moves[-1] == name:
+            moves[-1] = name[0] + '2'
+        else:
+            moves.append(name)
+    return moves
 
 
 class Cube:
     def __init__(self, cube=None):
         if cube is None:
-            self.cube = {'F': [[0, 0, 0], [0, 0, 0], [0, 0, 0]],
-                         'U': [[1, 1, 1], [1, 1, 1], [1, 1, 1]],
-                         'L': [[2, 2, 2], [2, 2, 2], [2, 2, 2]],
-                         'R': [[3, 3, 3], [3, 3, 3], [3, 3, 3]],
-                         'D': [[4, 4, 4], [4, 4, 4], [4, 4, 4]],
-                         'B': [[5, 5, 5], [5, 5, 5], [5, 5, 5]]}
+            self.state = SOLVED
         else:
-            self.cube = cube
+            self.state = self.to_state(cube)
         self.func = {'F': self.F, 'U': self.U,
                      'L': self.L, 'R': self.R,
                      'D': self.D, 'B': self.B}
@@ -96,136 +250,260 @@ class Cube:
                      'D': self.D, 'D_': self.D_,
                      'B': self.B, 'B_': self.B_}
         self.rotates = []
-        self.update_corners()
-        self.update_centers()
-        self.rotates = []
+        self.iterations = 0
+        self.budget = None
+        self.stats = None
 
     def reset(self):
         """
         Reset the Cube
         """
-        self.cube = {'F': [[0, 0, 0], [0, 0, 0], [0, 0, 0]],
-                     'U': [[1, 1, 1], [1, 1, 1], [1, 1, 1]],
-                     'L': [[2, 2, 2], [2, 2, 2], [2, 2, 2]],
-                     'R': [[3, 3, 3], [3, 3, 3], [3, 3, 3]],
-                     'D': [[4, 4, 4], [4, 4, 4], [4, 4, 4]],
-                     'B': [[5, 5, 5], [5, 5, 5], [5, 5, 5]]}
+        self.state = SOLVED
         self.rotates = []
 
+    @property
+    def state(self):
+        """
+        State of the cube as a tuple of 54 facelet colors
+        """
+        return self._state
+
+    @state.setter
+    def state(self, state):
+        self._state = state
+        self._corners = None
+        self._centers = None
+
+    @staticmethod
+    def to_state(cube):
+        """
+        Convert a dict of six 3x3 lists to a facelet tuple
+        """
+        return tuple(cube[side][i][j] for side in FACES for i in range(3) for j in range(3))
+
+    @property
+    def cube(self):
+        """
+        State of the cube as a dict of six 3x3 lists
+        """
+        s = self.state
+        return {side: [list(s[k + 3 * i:k + 3 * i + 3]) for i in range(3)]
+                for side, k in zip(FACES, range(0, 54, 9))}
+
+    @cube.setter
+    def cube(self, cube):
+        self.state = self.to_state(cube)
+
     def rotate(self, side):
-        self.dire[side]()
+        if side[-1] == '2':
+            self.turn(side)
+            self.rotates += [self.values[side[0]] + 1] * 2
+        else:
+            self.dire[side]()
 
-    def generate_random_cube(self):
+    def generate_random_cube(self, seed=None):
         """
-        Generate a random Cube
+        Generate a random Cube, uniformly over all the solvable cubes
+        (the same seed gives the same cube)
         """
-        rots = "FULRDB"
-        funs = [self.func, self.anti_func]
-        for i in range(300):
-            c = choice(rots)
-            f = choice(funs)
-            f[c]()
+        from .cubie import random_cubie
+        rng = random if seed is None else random.Random(seed)
+        self.state = random_cubie(rng).to_state()
         self.rotates = []
 
     def update_rotates(self):
         """
         Remove Unnecessary (Repetitive) Rotations
         """
-        temp = []
-        k = 0
-        for i, j in enumerate(self.rotates):
-            if k > 0:
-                k -= 1
-                continue
-            if i < len(self.rotates) - 3:
-                if self.rotates[i] == self.rotates[i+1] == -self.rotates[i+2] == -self.rotates[i+3]:
-                    k = 3
-                    continue
-                elif self.rotates[i] == -self.rotates[i + 1]:
-                    k = 1
-                    continue
-                elif self.rotates[i] == self.rotates[i+1] == self.rotates[i+2] == self.rotates[i+3]:
-                    k = 3
-                    continue
-                elif self.rotates[i] == self.rotates[i+1] == self.rotates[i+2]:
-                    j = -self.rotates[i]
-                    k = 2
-            temp.append(j)
-        self.rotates = temp
+        self.rotates = optimize_rotates(self.rotates)
+
+    @property
+    def corners(self):
+        if self._corners is None:
+            self.update_corners()
+        return self._corners
+
+    @property
+    def white_cor(self):
+        if self._corners is None:
+            self.update_corners()
+        return self._white_cor
+
+    @property
+    def yellow_cor(self):
+        if self._corners is None:
+            self.update_corners()
+        return self._yellow_cor
+
+    @property
+    def centers(self):
+        if self._centers is None:
+            self.update_centers()
+        return self._centers
+
+    @property
+    def s_centers(self):
+        if self._centers is None:
+            self.update_centers()
+        return self._s_centers
+
+    @property
+    def middle_cen(self):
+        if self._centers is None:
+            self.update_centers()
+        return self._middle_cen
+
+    @property
+    def white_cen(self):
+        if self._centers is None:
+            self.update_centers()
+        return self._white_cen
 
     def update_corners(self):
         """
         Update Corners of the Cube
+        (done on demand, the first time a corner view is read after a move)
         """
-        f, u, l, r, d, b = self.cube['F'], self.cube['U'], self.cube['L'], self.cube['R'], self.cube['D'], self.cube['B']
-        corners = {'FUL': [f[0][0], u[2][0], l[0][2]],
-                   'FUR': [f[0][2], u[2][2], r[0][0]],
-                   'FDL': [f[2][0], d[0][0], l[2][2]],
-                   'FDR': [f[2][2], d[0][2], r[2][0]],
-                   'BUL': [b[2][0], u[0][0], l[0][0]],
-                   'BUR': [b[2][2], u[0][2], r[0][2]],
-                   'BDL': [b[0][0], d[2][0], l[2][0]],
-                   'BDR': [b[0][2], d[2][2], r[2][2]]}
-        self.white_cor = {}
-        self.yellow_cor = {}
+        s = self.state
+        corners = {k: list(g(s)) for k, g in CORNER_GATHER.items()}
+        self._white_cor = {}
+        self._yellow_cor = {}
         for k in corners:
             if 0 in corners[k]:
-                self.white_cor[k] = corners[k]
+                self._white_cor[k] = corners[k]
             if 5 in corners[k]:
-                self.yellow_cor[k] = corners[k]
-        self.corners = corners
+                self._yellow_cor[k] = corners[k]
+        self._corners = corners
 
     def update_centers(self):
         """
         Update Edges of the Cube
-        """
-        f, u, l, r, d, b = self.cube['F'], self.cube['U'], self.cube['L'], self.cube['R'], self.cube['D'], self.cube['B']
-        c = {'FU': [f[0][1], u[2][1]],
-             'FL': [f[1][0], l[1][2]],
-             'FD': [f[2][1], d[0][1]],
-             'FR': [f[1][2], r[1][0]],
-             'BU': [b[2][1], u[0][1]],
-             'BL': [b[1][0], l[1][0]],
-             'BD': [b[0][1], d[2][1]],
-             'BR': [b[1][2], r[1][2]],
-             'UL': [u[1][0], l[0][1]],
-             'UR': [u[1][2], r[0][1]],
-             'DL': [d[1][0], l[2][1]],
-             'DR': [d[1][2], r[2][1]]}
-        self.s_centers = {'F': {}, 'B': {}, 'U': {},
-                          'D': {}, 'L': {}, 'R': {}}
-        self.middle_cen = {'UL': None, 'UR': None, 'DL': None, 'DR': None}
-        self.white_cen = {}
+        (done on demand, the first time an edge view is read after a move)
+        """
+        s = self.state
+        c = {k: list(g(s)) for k, g in EDGE_GATHER.items()}
+        self._s_centers = {'F': {}, 'B': {}, 'U': {},
+                           'D': {}, 'L': {}, 'R': {}}
+        self._middle_cen = {'UL': None, 'UR': None, 'DL': None, 'DR': None}
+        self._white_cen = {}
         for k in c:
             if 'F' in k:
-                self.s_centers['F'][k] = c[k]
+                self._s_centers['F'][k] = c[k]
             if 'B' in k:
-                self.s_centers['B'][k] = c[k]
+                self._s_centers['B'][k] = c[k]
             if 'U' in k:
-                self.s_centers['U'][k] = c[k]
+                self._s_centers['U'][k] = c[k]
             if 'D' in k:
-                self.s_centers['D'][k] = c[k]
+                self._s_centers['D'][k] = c[k]
             if 'L' in k:
-                self.s_centers['L'][k] = c[k]
+                self._s_centers['L'][k] = c[k]
             if 'R' in k:
-                self.s_centers['R'][k] = c[k]
+                self._s_centers['R'][k] = c[k]
             if 0 in c[k]:
-                self.white_cen[k] = c[k]
-        for k in self.middle_cen:
-            self.middle_cen[k] = c[k]
-        self.centers = c
-
-    def solve(self):
-        self.first_layer()
-        self.update_rotates()
+                self._white_cen[k] = c[k]
+        for k in self._middle_cen:
+            self._middle_cen[k] = c[k]
+        self._centers = c
+
+    def solve(self, method='cfop', cache=None, stats=None, budget=None):
+        """
+        Solve the Cube, method is 'cfop' (layer by layer, the default)
+        or 'two_phase' (Kociemba, about 20 - 22 moves)
+        or 'optimal' / 'optimal_qtm' (shortest solution in the half turn /
+        quarter turn metric, slow for cubes far from solved).
+        With a cache (cube.SolveCache) a cube solved before is not solved again.
+        With stats (cube.SolveStats) the time, moves and loop iterations
+        of every stage are recorded.
+        Raises InvalidCube (a ValueError) if the cube can not be solved,
+        SolveBudgetExceeded past the limits of the budget (cube.SolveBudget,
+        default SolveBudget(): the optimal methods stop after 60 seconds).
+        """
+        if budget is None:
+            budget = SolveBudget()
+        if stats is not None:
+            self.stats = stats
+            stats.reset()
+            start = perf_counter()
+            try:
+                return self.solve(method, cache, budget=budget)
+            finally:
+                self.stats = None
+                stats.finish(perf_counter() - start, len(self.rotates))
+
+        if cache is not None:
+            state = self.state
+            solution = cache.lookup(state, method)
+            if solution is None:
+                rotates, self.rotates = self.rotates, []
+                try:
+                    solution = self.solve(method, budget=budget)
+                finally:
+                    # the moves made (all of them, or the ones before an error) follow the earlier ones
+                    self.rotates = rotates + self.rotates
+                cache.store(state, method, solution)
+                return self.rotates
+            self.state = SOLVED
+            self.rotates += solution
+            return self.rotates
+
+        budget.start(self, method)
+        from .parallel import SEARCH_METHODS, method_search
+        if method in SEARCH_METHODS:
+            from .cubie import MOVE_NAMES
+            def tree_search():
+                search = method_search(method)
+                try:
+                    moves = search.solve(verify(self.state), timeout=budget.remaining(),
+                                         nodes=budget.remaining_iterations(self))
+                finally:
+                    # every node searched is an iteration
+                    self.iterations += search.nodes
+                if moves is None:
+                    raise ValueError(f'No solution found by {method}')
+                for m in moves:
+                    self.rotate(MOVE_NAMES[m])
+                budget.check(self)
+            self.run_stage(method, tree_search)
+            return self.rotates
+        if method != 'cfop':
+            raise ValueError(f'Unknown solving method {method!r}')
+        # the stages below never end on an impossible cube
+        verify(self.state)
+
+        self.budget = budget
+        try:
+            self.first_layer()
+            self.update_rotates()
+
+            self.run_stage('second_layer', self.second_layer)
+            self.update_rotates()
+
+            self.last_layer()
+            self.update_rotates()
+        finally:
+            self.budget = None
 
-        self.second_layer()
-        self.update_rotates()
+        return self.rotates
 
-        self.last_layer()
-        self.update_rotates()
+    def step(self):
+        """
+        Count an iteration of a solver loop, raises SolveBudgetExceeded
+        past the budget of the running solve
+        """
+        self.iterations += 1
+        if self.budget is not None:
+            self.budget.check(self)
 
-        return self.rotates
+    def run_stage(self, name, stage):
+        """
+        Run a stage of the solver, recorded in self.stats (if any)
+        """
+        if self.stats is None:
+            stage()
+            return
+        start, n, iterations = perf_counter(), len(self.rotates), self.iterations
+        stage()
+        self.stats.record(name, perf_counter() - start, self.rotates[n:], self.iterations - iterations)
 
     def first_layer(self):
         """
@@ -243,6 +521,7 @@ class Cube:
             next = {'L': 'U', 'U': 'R', 'R': 'D', 'D': 'L'}
             prev = {'U': 'L', 'L': 'D', 'D': 'R', 'R': 'U'}
             for n in range(4):
+                self.step()
                 wc = self.white_cen
                 for k in wc:
                     key = k
@@ -316,132 +595,41 @@ class Cube:
             for k in wc:
                 side = k[1]
                 while self.s_centers['B'][k][1] != self.values[side] or self.s_centers['B'][k][0] != 0:
+                    self.step()
                     self.func['B']()
                 self.func[side]()
                 self.func[side]()
 
         def white_corners():
             """
-            Solve White Corners
+            Solve White Corners (insert sequences looked up in cube.f2l)
             """
-            def algo(key):
-                side = {'FUR': 'U', 'BUR': 'U',
-                        'FUL': 'L', 'BUL': 'L',
-                        'FDL': 'D', 'BDL': 'D',
-                        'FDR': 'R', 'BDR': 'R'}
-                self.anti_func[side[key]]()
-                self.anti_func['B']()
-                self.func[side[key]]()
-                self.func['B']()
-
-            temp_values = {'FUR': [0, 1, 3], 'FUL': [0, 1, 2],
-                           'FDR': [0, 4, 3], 'FDL': [0, 4, 2]}
-
-            neighbors = {'BUR': 'BDR', 'BUL': 'BUR',
-                         'BDR': 'BDL', 'BDL': 'BUL'}
-
-            for i in temp_values:
-                if sorted(self.corners[i]) == sorted(temp_values[i]):
-                    while self.corners[i] != temp_values[i]:
-                        algo(i)
-                    continue
-                for j in self.white_cor:
-                    if sorted(self.white_cor[j]) == sorted(temp_values[i]):
-                        if 'F' in j:
-                            algo(j)
-                            j = f'B{j[1:]}'
-                        while j[1:] != i[1:]:
-                            self.anti_func['B']()
-                            j = neighbors[j]
-                        while self.corners[i] != temp_values[i]:
-                            algo(j)
-                        break
+            from .f2l import CORNER_SLOTS
+            self.insert(CORNER_SLOTS)
 
-        daisy()
-        white_cross()
-        white_corners()
+        self.run_stage('daisy', daisy)
+        self.run_stage('white_cross', white_cross)
+        self.run_stage('white_corners', white_corners)
 
     def second_layer(self):
         """
-        Solve Second Layer of the Cube
-        """
-        def algo1(s1, s2):
-            self.func[s1]()
-            self.func[s2]()
-            self.anti_func[s1]()
-            self.anti_func[s2]()
-
-        def algo2(s1, s2):
-            self.anti_func[s1]()
-            self.anti_func[s2]()
-            self.func[s1]()
-            self.func[s2]()
-
-        def left(val):
-            val = sorted(val)
-            key = int(f'{val[0]}{val[1]}')
-            l_s = {12: 'L', 13: 'U', 24: 'D', 34: 'R'}
-            f_s = {12: 'U', 13: 'R', 24: 'L', 34: 'D'}
-            algo2('B', l_s[key])
-            algo1('B', f_s[key])
-
-        def right(val):
-            val = sorted(val)
-            key = int(f'{val[0]}{val[1]}')
-            r_s = {12: 'U', 13: 'R', 24: 'L', 34: 'D'}
-            f_s = {12: 'L', 13: 'U', 24: 'D', 34: 'R'}
-            algo1('B', r_s[key])
-            algo2('B', f_s[key])
-
-        def check_pos(key, val):
-            if self.values[key[1]] == val[1]:
-                return True
-            return False
-
-        def correct_pos(key, val):
-            i1, i2 = self.values[key[0]], self.values[key[1]]
-            if i1 == val[0] and i2 == val[1]:
-                return True
-            return False
-
-        def place(v):
-            lefts = [121, 133, 242, 141]
-            tc = self.s_centers['B']
-            for ke in tc:
-                if v == tc[ke]:
-                    k = ke
-                    break
-            if check_pos(k, v[:]):
-                v.sort()
-                v = int(f'{v[0]}{v[1]}{tc[k][1]}')
-                if v in lefts:
-                    left(tc[k][:])
-                else:
-                    right(tc[k][:])
-            else:
-                self.func['B']()
-                place(v)
+        Solve Second Layer of the Cube (insert sequences looked up in cube.f2l)
+        """
+        from .f2l import EDGE_SLOTS
+        self.insert(EDGE_SLOTS)
+
+    def insert(self, slots):
+        """
+        Apply the insert sequences of cube.f2l until every slot
+        (f2l.CORNER_SLOTS or f2l.EDGE_SLOTS) is solved
+        """
+        from .f2l import next_insert
         while True:
-            top_cen = self.s_centers['B']
-            nums = [1, 2, 3, 4]
-            placeables = []
-            for k in top_cen:
-                if all(i in nums for i in top_cen[k]):
-                    placeables.append(top_cen[k][:])
-            if len(placeables) != 0:
-                place(placeables[0][:])
-            else:
-                mc = self.middle_cen
-                correctables = []
-                for k in mc:
-                    if all(i in nums for i in mc[k]):
-                        if not correct_pos(k, mc[k]):
-                            correctables.append(k)
-                if len(correctables) == 0:
-                    return
-                else:
-                    k = correctables[0]
-                    left(mc[k][:])
+            self.step()
+            moves = next_insert(self.state, slots)
+            if moves is None:
+                return
+            self.apply(macro(*moves))
 
     def last_layer(self):
         """
@@ -452,14 +640,10 @@ class Cube:
             Orient Edges in the correct orientation
             """
             def algo():
-                s = "URB"
-                for i in s:
-                    self.func[i]()
-                s = "RBU"
-                for i in s:
-                    self.anti_func[i]()
+                self.apply(ORIENT_EDGES)
 
             for n in range(4):
+                self.step()
                 tc = self.s_centers['B']
                 corrects = []
                 for k in tc:
@@ -494,14 +678,7 @@ class Cube:
             Solve oriented Edges
             """
             def algo():
-                s = "RB"
-                for i in s:
-                    self.func[i]()
-                self.anti_func['R']()
-                s = "BRBB"
-                for i in s:
-                    self.func[i]()
-                self.anti_func['R']()
+                self.apply(PERMUTE_EDGES)
 
             def done():
                 t_c = self.s_centers['B']
@@ -552,6 +729,7 @@ class Cube:
                 return False
 
             while True:
+                self.step()
                 if check_opps() and not check_neibs():
                     algo()
                 elif check_neibs() and not done():
@@ -569,14 +747,7 @@ class Cube:
             Permute Corners
             """
             def algo():
-                self.func['B']()
-                self.func['R']()
-                self.anti_func['B']()
-                self.anti_func['L']()
-                self.func['B']()
-                self.anti_func['R']()
-                self.anti_func['B']()
-                self.func['L']()
+                self.apply(PERMUTE_CORNERS)
 
             def check_pos(pos):
                 l_n = {'BUL': 'BL', 'BUR': 'BU',
@@ -595,18 +766,18 @@ class Cube:
                 return False
 
             def correct_one():
-                for i in range(4):
-                    if check_pos('BUR'):
-                        break
-                    else:
+                while True:
+                    self.step()
+                    for i in range(4):
+                        if check_pos('BUR'):
+                            return
                         self.func['B']()
-                else:
                     algo()
-                    correct_one()
 
             correct_one()
             yck = (self.yellow_cor.keys())
             while True:
+                self.step()
                 n = 0
                 for k in yck:
                     if check_pos(k):
@@ -618,19 +789,12 @@ class Cube:
                         self.func['B']()
                     break
                 else:
-                    algo()
-                    algo()
+                    self.apply(PERMUTE_CORNERS_TWICE)
 
         def orient_corners():
             """
             Orient permuted Corners in the correct Orientation
             """
-            def algo():
-                self.anti_func['R']()
-                self.anti_func['F']()
-                self.func['R']()
-                self.func['F']()
-
             def check_pos(pos):
                 l_n = {'BUL': 'BL', 'BUR': 'BU',
                        'BDR': 'BR', 'BDL': 'BD'}
@@ -657,213 +821,130 @@ class Cube:
             yck = (self.yellow_cor.keys())
             for s in range(4):
                 while not correct('BUR'):
-                    algo()
-                    algo()
+                    self.step()
+                    self.apply(ORIENT_CORNER_TWICE)
                 self.func['B']()
                 while not check_pos('BUR'):
+                    self.step()
                     self.func['B']()
 
-        orient_edges()
-        permute_edges()
-        permute_corners()
-        orient_corners()
+        self.run_stage('orient_edges', orient_edges)
+        self.run_stage('permute_edges', permute_edges)
+        self.run_stage('permute_corners', permute_corners)
+        self.run_stage('orient_corners', orient_corners)
 
     def F(self):
         """
         For Rotating Clockwise FRONT (White Face) side of the cube
         """
-        self.rotate_clockwise('F')
-        r = self.cube['R']
-        l = self.cube['L']
-        u = self.cube['U']
-        d = self.cube['D']
-        temp1, temp2 = [], []
-        for i in range(3):
-            temp1.append(l[2 - i][2])
-            temp2.append(r[2 - i][0])
-        for i in range(3):
-            u[2][i], r[i][0], d[0][i], l[i][2] = temp1[i], u[2][i], temp2[i], d[0][i]
+        self.turn('F')
         self.rotates.append(1)
-        self.update_corners()
-        self.update_centers()
 
     def F_(self):
         """
         For Rotating Anti Clockwise FRONT (White Face) side of the cube
         """
-        self.rotate_anticlockwise('F')
-        r = self.cube['R']
-        l = self.cube['L']
-        u = self.cube['U']
-        d = self.cube['D']
-        temp1, temp2 = [], []
-        for i in range(3):
-            temp1.append(d[0][2 - i])
-            temp2.append(u[2][2 - i])
-        for i in range(3):
-            u[2][i], r[i][0], d[0][i], l[i][2] = r[i][0], temp1[i], l[i][2], temp2[i]
+        self.turn('F_')
         self.rotates.append(-1)
-        self.update_corners()
-        self.update_centers()
 
     def U(self):
         """
         For Rotating Clockwise UP (Green Face) side of the cube
         """
-        self.rotate_clockwise('U')
-        f = self.cube['F']
-        r = self.cube['R']
-        b = self.cube['B']
-        l = self.cube['L']
-        f[0], l[0], b[2], r[0] = r[0], f[0], list(reversed(l[0])), list(reversed(b[2]))
+        self.turn('U')
         self.rotates.append(2)
-        self.update_corners()
-        self.update_centers()
 
     def U_(self):
         """
         For Rotating Anti Clockwise UP (Green Face) side of the cube
         """
-        self.rotate_anticlockwise('U')
-        f = self.cube['F']
-        r = self.cube['R']
-        b = self.cube['B']
-        l = self.cube['L']
-        f[0], l[0], b[2], r[0] = l[0], list(reversed(b[2])), list(reversed(r[0])), f[0]
+        self.turn('U_')
         self.rotates.append(-2)
-        self.update_corners()
-        self.update_centers()
 
     def L(self):
         """
         For Rotating Clockwise LEFT (Red Face) side of the cube
         """
-        self.rotate_clockwise('L')
-        f = self.cube['F']
-        u = self.cube['U']
-        b = self.cube['B']
-        d = self.cube['D']
-        for i in range(3):
-            f[i][0], u[i][0], b[i][0], d[i][0] = u[i][0], b[i][0], d[i][0], f[i][0]
+        self.turn('L')
         self.rotates.append(3)
-        self.update_corners()
-        self.update_centers()
 
     def L_(self):
         """
         For Rotating Anti Clockwise LEFT (Red Face) side of the cube
         """
-        self.rotate_anticlockwise('L')
-        f = self.cube['F']
-        u = self.cube['U']
-        b = self.cube['B']
-        d = self.cube['D']
-        for i in range(3):
-            f[i][0], u[i][0], b[i][0], d[i][0] = d[i][0], f[i][0], u[i][0], b[i][0]
+        self.turn('L_')
         self.rotates.append(-3)
-        self.update_corners()
-        self.update_centers()
 
     def R(self):
         """
         For Rotating Clockwise RIGHT (Opposite Face of Red) side of the cube
         """
-        self.rotate_clockwise('R')
-        f = self.cube['F']
-        u = self.cube['U']
-        b = self.cube['B']
-        d = self.cube['D']
-        for i in range(3):
-            f[i][2], u[i][2], b[i][2], d[i][2] = d[i][2], f[i][2], u[i][2], b[i][2]
+        self.turn('R')
         self.rotates.append(4)
-        self.update_corners()
-        self.update_centers()
 
     def R_(self):
         """
         For Rotating Anti Clockwise RIGHT (Opposite Face of Red) side of the cube
         """
-        self.rotate_anticlockwise('R')
-        f = self.cube['F']
-        u = self.cube['U']
-        b = self.cube['B']
-        d = self.cube['D']
-        for i in range(3):
-            f[i][2], u[i][2], b[i][2], d[i][2] = u[i][2], b[i][2], d[i][2], f[i][2]
+        self.turn('R_')
         self.rotates.append(-4)
-        self.update_corners()
-        self.update_centers()
 
     def D(self):
         """
         For Rotating Clockwise DOWN (Opposite Face of Green) side of the cube
         """
-        self.rotate_clockwise('D')
-        f = self.cube['F']
-        r = self.cube['R']
-        b = self.cube['B']
-        l = self.cube['L']
-        f[2], l[2], b[0], r[2] = l[2], list(reversed(b[0])), list(reversed(r[2])), f[2]
+        self.turn('D')
         self.rotates.append(5)
-        self.update_corners()
-        self.update_centers()
 
     def D_(self):
         """
         For Rotating Anti Clockwise DOWN (Opposite Face of Green) side of the cube
         """
-        self.rotate_anticlockwise('D')
-        f = self.cube['F']
-        r = self.cube['R']
-        b = self.cube['B']
-        l = self.cube['L']
-        f[2], l[2], b[0], r[2] = r[2], f[2], list(reversed(l[2])), list(reversed(b[0]))
+        self.turn('D_')
         self.rotates.append(-5)
-        self.update_corners()
-        self.update_centers()
 
     def B(self):
         """
         For Rotating Clockwise BACK (Opposite Face of White) side of the cube
         """
-        self.rotate_clockwise('B')
-        r = self.cube['R']
-        l = self.cube['L']
-        u = self.cube['U']
-        d = self.cube['D']
-        temp1, temp2 = [], []
-        for i in range(3):
-            temp1.append(d[2][2 - i])
-            temp2.append(u[0][2 - i])
-        for i in range(3):
-            u[0][i], r[i][2], d[2][i], l[i][0] = r[i][2], temp1[i], l[i][0], temp2[i]
+        self.turn('B')
         self.rotates.append(6)
-        self.update_corners()
-        self.update_centers()
 
     def B_(self):
         """
         For Rotating Anti Clockwise BACK (Opposite Face of White) side of the cube
         """
-        self.rotate_anticlockwise('B')
-        r = self.cube['R']
-        l = self.cube['L']
-        u = self.cube['U']
-        d = self.cube['D']
-        temp1, temp2 = [], []
-        for i in range(3):
-            temp1.append(l[2 - i][0])
-            temp2.append(r[2 - i][2])
-        for i in range(3):
-            u[0][i], r[i][2], d[2][i], l[i][0] = temp1[i], u[0][i], temp2[i], d[2][i]
+        self.turn('B_')
         self.rotates.append(-6)
-        self.update_corners()
-        self.update_centers()
 
-    def rotate_clockwise(self, side):
-        s = self.cube[side]
-        s[0][0], s[0][1], s[0][2], s[1][0], s[1][2], s[2][0], s[2][1], s[2][2] = s[2][0], s[1][0], s[0][0], s[2][1], s[0][1], s[2][2], s[1][2], s[0][2]
+    def apply(self, macro):
+        """
+        Apply a compiled sequence of moves (see macro()) in one step,
+        its moves are recorded in the solution
+        """
+        gather, rotates = macro
+        self.state = gather(self.state)
+        self.rotates += rotates
+
+    def play(self, text):
+        """
+        Apply moves in standard notation ("R U R' U2", wide, slice moves
+        and rotations, see cube.notation), compiled once and applied in one step
+        """
+        from .notation import compile_moves
+        self.apply(compile_moves(text).macro)
+
+    def turn(self, move):
+        """
+        Apply the precomputed permutation of a move ('F', 'F_', 'F2', ...)
+        to the facelets, without recording it in the solution
+        """
+        self.state = GATHER[move](self.state)
+
 
-    def rotate_anticlockwise(self, side):
-        s = self.cube[side]
-        s[0][0], s[0][1], s[0][2], s[1][0], s[1][2], s[2][0], s[2][1], s[2][2] = s[0][2], s[1][2], s[2][2], s[0][1], s[2][1], s[0][0], s[1][0], s[2][0]
+from .batch import solve_many, isolve_many
+from .cache import SolveCache
+from .stats import SolveStats
+from .budget import SolveBudget, SolveBudgetExceeded
+from .cubie import InvalidCube, verify
+from .parallel import ParallelSearch
@@ -0,0 +1,68 @@
+"""
+    Headless solver: states in on stdin, solutions out on stdout
+
+    python -m cube [--method cfop] [--format rotates] [--workers 1]
+                   [--timeout SECONDS] [input]
+
+    Every input line is a cube: 54 facelet colors in the order of Cube.state
+    (digits '0' ... '5' or sides 'F', 'U', ...), or a JSON dict like Cube.cube.
+    Every output line is its solution, as Cube.rotates values ("1 -2 4")
+    or in standard notation ("F U' R2"), or "ERROR <message>" (also for
+    a cube not solved within --timeout seconds).
+    Lines are read and written as they go (with a bounded read ahead),
+    so the input can be larger than the memory.
+"""
+
+import argparse
+import sys
+
+from . import to_notation
+from .batch import METHODS, isolve_many
+from .budget import OPTIMAL_TIMEOUT
+
+
+def format_solution(solution, fmt):
+    if isinstance(solution, Exception):
+        return f'ERROR {solution}'
+    if fmt == 'notation':
+        return ' '.join(to_notation(solution))
+    return ' '.join(str(r) for r in solution)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m cube', description='Solve cubes read line by line.')
+    parser.add_argument('input', nargs='?', type=argparse.FileType('r'), default=sys.stdin,
+                        help='file of states, one per line (default: stdin)')
+    parser.add_argument('--method', default='cfop', choices=METHODS)
+    parser.add_argument('--format', default='rotates', choices=['rotates', 'notation'])
+    parser.add_argument('--workers', type=int, default=1, help='worker processes (default: 1)')
+    parser.add_argument('--chunksize', type=int, default=64,
+                        help='states sent to a worker at once (it starts once they are read)')
+    parser.add_argument('--timeout', type=float, default=None,
+                        help=f'seconds per cube (default: {OPTIMAL_TIMEOUT:g} for the optimal methods, '
+                             'no limit for the others)')
+    parser.add_argument('--window', type=int, default=None,
+                        help='states read ahead of the output (default: 8 chunks per worker)')
+    args = parser.parse_args(argv)
+
+    window = args.window or args.workers * args.chunksize * 8
+    lines = (line for line in args.input if line.strip())
+    out = sys.stdout
+    # a pipe or a terminal gets every solution at once, a file is buffered
+    flush = not out.seekable()
+    try:
+        for i, solution in isolve_many(lines, args.workers, args.chunksize, args.method,
+                                       ordered=True, window=window, errors=True, timeout=args.timeout):
+            out.write(format_solution(solution, args.format) + '\n')
+            if flush:
+                out.flush()
+        out.flush()
+    except BrokenPipeError:
+        # the reader of the output stopped (e.g. head)
+        sys.stderr.close()
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
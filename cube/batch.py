@@ -0,0 +1,145 @@
+"""
+    Solve many cubes over a pool of worker processes
+
+    A state is either a dict of six 3x3 lists (Cube.cube), a tuple of
+    54 facelet colors (Cube.state) or a line of text (see parse_state).
+"""
+
+import json
+from multiprocessing import Pool
+from os import cpu_count
+from threading import Event, Semaphore
+
+from . import Cube, FACES
+from .budget import SolveBudget
+from .parallel import SEARCH_METHODS, method_search
+
+
+METHODS = ('cfop', 'two_phase', 'optimal', 'optimal_qtm')
+
+
+def parse_state(text):
+    """
+    Facelet tuple of a line of text: a JSON dict of six 3x3 lists (Cube.cube)
+    or 54 facelet colors, as digits ('0' ... '5') or sides ('F', 'U', ...)
+    """
+    text = text.strip()
+    if text.startswith('{'):
+        return Cube.to_state(json.loads(text))
+    if len(text) != 54:
+        raise ValueError(f'Expected 54 facelets, got {len(text)}')
+    if text.isdigit():
+        state = tuple(int(c) for c in text)
+    else:
+        state = tuple(FACES.index(c) if c in FACES else 6 for c in text.upper())
+    if max(state) > 5:
+        raise ValueError(f'Invalid facelet colors in {text!r}')
+    return state
+
+
+def to_state(state):
+    """
+    Facelet tuple of any state accepted by solve_many
+    """
+    if isinstance(state, dict):
+        return Cube.to_state(state)
+    if isinstance(state, str):
+        return parse_state(state)
+    return tuple(state)
+
+
+def init_worker(*methods):
+    """
+    Load the tables of the solving methods once per worker
+    """
+    for method in methods:
+        if method in SEARCH_METHODS:
+            method_search(method)
+        elif method == 'cfop':
+            from .f2l import CORNER_SLOTS, EDGE_SLOTS, insert_table
+            insert_table(CORNER_SLOTS)
+            insert_table(EDGE_SLOTS)
+
+
+def solve_job(job):
+    """
+    (index, solution) of an (index, state, method, errors, seconds) job,
+    in a worker, the solve stops after seconds (None for the default budget)
+    """
+    index, state, method, errors, seconds = job
+    try:
+        cube = Cube()
+        cube.state = to_state(state)
+        budget = None if seconds is None else SolveBudget(seconds=seconds)
+        return index, cube.solve(method=method, budget=budget)
+    except Exception as e:
+        if not errors:
+            raise
+        return index, e
+
+
+def _bounded(jobs, slots, stopped):
+    """
+    The jobs, each one waiting for a free slot (released as its result is read)
+    """
+    for job in jobs:
+        slots.acquire()
+        if stopped.is_set():
+            return
+        yield job
+
+
+def _chunksize(states, workers):
+    try:
+        n = len(states)
+    except TypeError:
+        return 16
+    return max(1, n // (workers * 4))
+
+
+def isolve_many(states, workers=None, chunksize=None, method='cfop', ordered=False,
+                window=None, errors=False, timeout=None):
+    """
+    Iterator of (index, solution) for the states, solved by a pool of workers,
+    yielded as soon as they are solved (or in input order when ordered is True).
+    With a window, at most window states are read ahead of the results
+    (for long or endless iterators), else all of them are queued at once.
+    With errors, the exception raised by an invalid state is yielded
+    as its solution instead of being raised.
+    Every solve stops after timeout seconds (by default OPTIMAL_TIMEOUT
+    for the optimal methods, no limit for the others) with SolveBudgetExceeded.
+    """
+    if workers is None:
+        workers = cpu_count() or 1
+    if chunksize is None:
+        chunksize = _chunksize(states, workers)
+    jobs = ((i, s, method, errors, timeout) for i, s in enumerate(states))
+    if workers == 1:
+        init_worker(method)
+        yield from map(solve_job, jobs)
+        return
+    with Pool(workers, initializer=init_worker, initargs=(method,)) as pool:
+        imap = pool.imap if ordered else pool.imap_unordered
+        if window is None:
+            yield from imap(solve_job, jobs, chunksize)
+            return
+        # at most window states in flight, refilled as the results come
+        # (at least a chunk, the pool waits for full chunks)
+        slots = Semaphore(max(window, chunksize))
+        stopped = Event()
+        try:
+            for result in imap(solve_job, _bounded(jobs, slots, stopped), chunksize):
+                yield result
+                slots.release()
+        finally:
+            # unblock the pool reading the jobs
+            stopped.set()
+            slots.release()
+
+
+def solve_many(states, workers=None, chunksize=None, method='cfop', timeout=None):
+    """
+    Solutions (Cube.rotates) of the states, in input order
+    """
+    return [rotates for i, rotates in isolve_many(states, workers, chunksize, method, ordered=True,
+                                                  timeout=timeout)]
@@ -0,0 +1,84 @@
+"""
+    Limits of a solve
+
+    Every loop of the solver counts its iterations with Cube.step(), which
+    checks the SolveBudget of the running solve: past its iterations, moves
+    or seconds the solve stops with SolveBudgetExceeded, so no cube can
+    keep a solver (or a worker process) busy forever. The search methods
+    count the nodes they search as iterations.
+"""
+
+from time import perf_counter
+
+
+# seconds of the optimal methods under the default budget,
+# a random cube is out of their reach
+OPTIMAL_TIMEOUT = 60.0
+
+# limit of a SolveBudget left to its default
+DEFAULT = object()
+
+# default (iterations, moves, seconds) of every method
+DEFAULTS = {'cfop': (10000, 10000, None),
+            'two_phase': (10000000, 10000, None),
+            'optimal': (None, 10000, OPTIMAL_TIMEOUT),
+            'optimal_qtm': (None, 10000, OPTIMAL_TIMEOUT)}
+
+
+class SolveBudgetExceeded(Exception):
+    """
+    The solve went over its budget of iterations, moves or time
+    """
+
+
+class SolveBudget:
+    """
+    Most loop iterations, moves and seconds of a solve (None for no limit),
+    the defaults (DEFAULTS of the method) are far above what any solvable
+    cube needs, except for the optimal methods stopped after OPTIMAL_TIMEOUT
+    """
+    def __init__(self, iterations=DEFAULT, moves=DEFAULT, seconds=DEFAULT):
+        self.iterations = iterations
+        self.moves = moves
+        self.seconds = seconds
+        self.limits = None
+        self.last_iteration = None
+        self.last_move = None
+        self.deadline = None
+
+    def start(self, cube, method='cfop'):
+        """
+        Start counting from the current iterations and moves of the cube
+        """
+        defaults = DEFAULTS.get(method, DEFAULTS['cfop'])
+        self.limits = tuple(default if limit is DEFAULT else limit
+                            for limit, default in zip((self.iterations, self.moves, self.seconds), defaults))
+        iterations, moves, seconds = self.limits
+        self.last_iteration = None if iterations is None else cube.iterations + iterations
+        self.last_move = None if moves is None else len(cube.rotates) + moves
+        self.deadline = None if seconds is None else perf_counter() + seconds
+
+    def remaining_iterations(self, cube):
+        """
+        Iterations left (None without a limit)
+        """
+        if self.last_iteration is None:
+            return None
+        return max(0, self.last_iteration - cube.iterations)
+
+    def remaining(self):
+        """
+        Seconds left before the deadline (None without a deadline)
+        """
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - perf_counter())
+
+    def check(self, cube):
+        iterations, moves, seconds = self.limits
+        if self.last_iteration is not None and cube.iterations > self.last_iteration:
+            raise SolveBudgetExceeded(f'More than {iterations} iterations')
+        if self.last_move is not None and len(cube.rotates) > self.last_move:
+            raise SolveBudgetExceeded(f'More than {moves} moves')
+        if self.deadline is not None and perf_counter() > self.deadline:
+            raise SolveBudgetExceeded(f'More than {seconds} seconds')
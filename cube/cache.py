@@ -0,0 +1,87 @@
+"""
+    Bounded (LRU) cache of solutions
+
+    Solutions are stored by solving method and packed state, a repeated
+    solve of the same cube costs one dict lookup.
+    A symmetric cache stores the solution of the canonical state
+    (cube.symmetry), shared by up to 48 symmetric states.
+"""
+
+from collections import OrderedDict
+
+from .symmetry import canonical, transform_rotates, INVERSE
+
+
+def pack(state):
+    """
+    Compact hashable encoding of a facelet tuple (Cube.state): 54 bytes
+    """
+    return bytes(state)
+
+
+class SolveCache:
+    """
+    Least Recently Used cache of at most maxsize solutions
+    """
+    def __init__(self, maxsize=1024, symmetric=False):
+        self.maxsize = maxsize
+        self.symmetric = symmetric
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.data)
+
+    def key(self, state, method='cfop'):
+        """
+        (key, sym) of a state, sym is the symmetry giving the stored state
+        """
+        if self.symmetric:
+            state, sym = canonical(state)
+            return (method, pack(state)), sym
+        return (method, pack(state)), 0
+
+    def lookup(self, state, method='cfop'):
+        """
+        Cached solution of the state (a list of Cube.rotates values) or None
+        """
+        key, sym = self.key(state, method)
+        solution = self.get(key)
+        if solution is None or sym == 0:
+            return solution
+        return transform_rotates(solution, INVERSE[sym])
+
+    def store(self, state, method, solution):
+        key, sym = self.key(state, method)
+        if sym != 0:
+            solution = transform_rotates(solution, sym)
+        self.put(key, solution)
+
+    def get(self, key):
+        """
+        Cached solution (a tuple of Cube.rotates values) or None
+        """
+        solution = self.data.get(key)
+        if solution is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.data.move_to_end(key)
+        return solution
+
+    def put(self, key, solution):
+        self.data[key] = tuple(solution)
+        self.data.move_to_end(key)
+        while len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.data.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def info(self):
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'size': len(self.data), 'maxsize': self.maxsize}
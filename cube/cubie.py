@@ -0,0 +1,489 @@
+"""
+    Cubie level model of the cube
+
+    The cube is stored as the permutation and orientation of its 8 corners
+    and 12 edges (CubieCube), or as small integer coordinates of these
+    (CoordCube) where every move is a single lookup in a move table.
+
+    Corner positions (and pieces) are numbered in the order of CORNER_NAMES,
+    edge positions (and pieces) in the order of EDGE_NAMES, the names are
+    the same as the keys of Cube.corners and Cube.centers.
+
+    The orientation of a corner is the index (in CORNER_FACELETS) of the
+    facelet holding its FRONT or BACK color (White or Yellow).
+    The orientation of an edge is 0 if its first color (FRONT/BACK color,
+    or UP/DOWN color for the edges of the middle slice) is on the first
+    facelet of its position (in EDGE_FACELETS), else 1.
+    With this reference FRONT and BACK turns keep the orientation of the
+    corners, and UP and DOWN quarter turns are the only ones flipping edges.
+
+    The 18 moves are numbered 3 * FACES.index(side) + k, where k is
+    0 for a clockwise, 1 for a half and 2 for an anti clockwise turn
+    (MOVE_NAMES gives the names used by Cube.rotate).
+"""
+
+import random
+from array import array
+from itertools import permutations
+from math import comb
+from operator import itemgetter
+
+from . import FACES, MOVES, SOLVED, tables
+
+
+CORNER_NAMES = ['FUL', 'FUR', 'FDL', 'FDR', 'BUL', 'BUR', 'BDL', 'BDR']
+EDGE_NAMES = ['FU', 'FL', 'FD', 'FR', 'BU', 'BL', 'BD', 'BR', 'UL', 'UR', 'DL', 'DR']
+
+# facelets of every corner position, all in clockwise order
+CORNER_FACELETS = [(0, 15, 20), (2, 27, 17), (6, 26, 36), (8, 38, 33),
+                   (51, 18, 9), (53, 11, 29), (45, 42, 24), (47, 35, 44)]
+EDGE_FACELETS = [(1, 16), (3, 23), (7, 37), (5, 30),
+                 (52, 10), (48, 21), (46, 43), (50, 32),
+                 (12, 19), (14, 28), (39, 25), (41, 34)]
+
+CORNER_COLORS = [tuple(SOLVED[i] for i in f) for f in CORNER_FACELETS]
+EDGE_COLORS = [tuple(SOLVED[i] for i in f) for f in EDGE_FACELETS]
+CORNER_GETTERS = [itemgetter(*f) for f in CORNER_FACELETS]
+EDGE_GETTERS = [itemgetter(*f) for f in EDGE_FACELETS]
+# (piece, orientation) of the colors read on the facelets of a position
+CORNER_LOOKUP = {c[3 - o:] + c[:3 - o]: (p, o) for p, c in enumerate(CORNER_COLORS) for o in range(3)}
+EDGE_LOOKUP = {c[::1 - 2 * o]: (p, o) for p, c in enumerate(EDGE_COLORS) for o in range(2)}
+
+MOVE_NAMES = [f'{side}{k}' for side in FACES for k in ('', '2', '_')]
+
+N_MOVE = 18
+N_TWIST = 2187  # 3^7
+N_FLIP = 2048  # 2^11
+N_SLICE = 495  # C(12, 4)
+N_SLICE_SORTED = 11880  # 12! / 8!
+N_CORNERS = 40320  # 8!
+N_UD_EDGES = 40320  # 8!
+
+# moves keeping the cube in the subgroup <F, B, U2, D2, L2, R2>
+PHASE2_MOVES = (0, 1, 2, 4, 7, 10, 13, 15, 16, 17)
+
+SLICE_EDGES = (8, 9, 10, 11)
+F_EDGES = (0, 1, 2, 3)
+B_EDGES = (4, 5, 6, 7)
+
+
+def rank(perm):
+    """
+    Index of a permutation of distinct numbers, in lexicographic order
+    """
+    n = len(perm)
+    r = 0
+    for i in range(n - 1):
+        x = perm[i]
+        smaller = 0
+        for j in range(i + 1, n):
+            if perm[j] < x:
+                smaller += 1
+        r = r * (n - i) + smaller
+    return r
+
+
+def unrank(r, items):
+    """
+    Permutation of the (sorted) items with the given index
+    """
+    items = list(items)
+    n = len(items)
+    digits = []
+    for i in range(1, n + 1):
+        digits.append(r % i)
+        r //= i
+    return [items.pop(d) for d in reversed(digits)]
+
+
+def get_edge_set(ep, pieces):
+    """
+    Coordinate (0 ... 11879) of the positions and the order of four edges,
+    0 when they are at the positions of SLICE_EDGES in their order
+    """
+    a, x = 0, 0
+    found = []
+    for j in range(11, -1, -1):
+        if ep[j] in pieces:
+            x += 1
+            a += comb(11 - j, x)
+            found.append(ep[j])
+    found.reverse()
+    return 24 * a + rank([pieces.index(e) for e in found])
+
+
+def set_edge_set(coord, pieces):
+    """
+    An edge permutation with the given four edges placed as in the coordinate
+    (the other edges fill the remaining positions in their order)
+    """
+    a, b = divmod(coord, 24)
+    placed = unrank(b, pieces)
+    others = [e for e in range(12) if e not in pieces]
+    ep = []
+    x = 4
+    for j in range(12):
+        if x > 0 and a >= comb(11 - j, x):
+            a -= comb(11 - j, x)
+            ep.append(placed[4 - x])
+            x -= 1
+        else:
+            ep.append(others.pop(0))
+    return ep
+
+
+class CubieCube:
+    """
+    Permutation (cp, ep) and Orientation (co, eo) of Corners and Edges,
+    cp[i] is the corner at position i and co[i] its orientation
+    """
+    def __init__(self, cp=None, co=None, ep=None, eo=None):
+        self.cp = list(range(8)) if cp is None else list(cp)
+        self.co = [0] * 8 if co is None else list(co)
+        self.ep = list(range(12)) if ep is None else list(ep)
+        self.eo = [0] * 12 if eo is None else list(eo)
+
+    def __eq__(self, other):
+        return (self.cp, self.co, self.ep, self.eo) == (other.cp, other.co, other.ep, other.eo)
+
+    def copy(self):
+        return CubieCube(self.cp, self.co, self.ep, self.eo)
+
+    @classmethod
+    def from_state(cls, state):
+        """
+        Build the cubies from a facelet tuple (Cube.state)
+        """
+        cube = cls()
+        for i, getter in enumerate(CORNER_GETTERS):
+            colors = getter(state)
+            if colors not in CORNER_LOOKUP:
+                raise ValueError(f'Invalid colors {colors} on corner {CORNER_NAMES[i]}')
+            cube.cp[i], cube.co[i] = CORNER_LOOKUP[colors]
+        for i, getter in enumerate(EDGE_GETTERS):
+            colors = getter(state)
+            if colors not in EDGE_LOOKUP:
+                raise ValueError(f'Invalid colors {colors} on edge {EDGE_NAMES[i]}')
+            cube.ep[i], cube.eo[i] = EDGE_LOOKUP[colors]
+        return cube
+
+    def to_state(self):
+        """
+        Facelet tuple (Cube.state) of the cubies
+        """
+        state = list(SOLVED)
+        for i, facelets in enumerate(CORNER_FACELETS):
+            colors, ori = CORNER_COLORS[self.cp[i]], self.co[i]
+            for k in range(3):
+                state[facelets[(k + ori) % 3]] = colors[k]
+        for i, facelets in enumerate(EDGE_FACELETS):
+            colors, ori = EDGE_COLORS[self.ep[i]], self.eo[i]
+            for k in range(2):
+                state[facelets[(k + ori) % 2]] = colors[k]
+        return tuple(state)
+
+    def multiply(self, other):
+        """
+        Apply the permutation and orientation changes of other to this cube
+        """
+        cp, co, ep, eo = self.cp, self.co, self.ep, self.eo
+        self.cp = [cp[j] for j in other.cp]
+        self.co = [(co[j] + o) % 3 for j, o in zip(other.cp, other.co)]
+        self.ep = [ep[j] for j in other.ep]
+        self.eo = [(eo[j] + o) % 2 for j, o in zip(other.ep, other.eo)]
+
+    def move(self, m):
+        """
+        Apply move m (0 ... 17) to the cube
+        """
+        self.multiply(MOVE_CUBES[m])
+
+    def inverse(self):
+        """
+        Cube undoing this cube
+        """
+        cube = CubieCube()
+        for i, j in enumerate(self.cp):
+            cube.cp[j] = i
+            cube.co[j] = -self.co[i] % 3
+        for i, j in enumerate(self.ep):
+            cube.ep[j] = i
+            cube.eo[j] = self.eo[i]
+        return cube
+
+    def get_twist(self):
+        r = 0
+        for o in self.co[:7]:
+            r = 3 * r + o
+        return r
+
+    def set_twist(self, twist):
+        total = 0
+        for i in range(6, -1, -1):
+            twist, self.co[i] = divmod(twist, 3)
+            total += self.co[i]
+        self.co[7] = -total % 3
+
+    def get_flip(self):
+        r = 0
+        for o in self.eo[:11]:
+            r = 2 * r + o
+        return r
+
+    def set_flip(self, flip):
+        total = 0
+        for i in range(10, -1, -1):
+            flip, self.eo[i] = divmod(flip, 2)
+            total += self.eo[i]
+        self.eo[11] = total % 2
+
+    def get_slice_sorted(self):
+        return get_edge_set(self.ep, SLICE_EDGES)
+
+    def set_slice_sorted(self, coord):
+        self.ep = set_edge_set(coord, SLICE_EDGES)
+
+    def get_slice(self):
+        return self.get_slice_sorted() // 24
+
+    def get_f_edges(self):
+        return get_edge_set(self.ep, F_EDGES)
+
+    def set_f_edges(self, coord):
+        self.ep = set_edge_set(coord, F_EDGES)
+
+    def get_b_edges(self):
+        return get_edge_set(self.ep, B_EDGES)
+
+    def set_b_edges(self, coord):
+        self.ep = set_edge_set(coord, B_EDGES)
+
+    def get_corners(self):
+        return rank(self.cp)
+
+    def set_corners(self, coord):
+        self.cp = unrank(coord, range(8))
+
+    def get_ud_edges(self):
+        """
+        Permutation of the 8 edges out of the middle slice,
+        only valid when they are all out of it
+        """
+        return rank(self.ep[:8])
+
+    def set_ud_edges(self, coord):
+        self.ep[:8] = unrank(coord, range(8))
+        self.ep[8:] = SLICE_EDGES
+
+    def corner_parity(self):
+        return _parity(self.cp)
+
+    def edge_parity(self):
+        return _parity(self.ep)
+
+
+def _parity(perm):
+    """
+    0 for an even, 1 for an odd permutation (of 0 ... n - 1)
+    """
+    seen = [False] * len(perm)
+    s = 0
+    for i in range(len(perm)):
+        if not seen[i]:
+            s += 1
+            while not seen[i]:
+                seen[i] = True
+                i = perm[i]
+    return (len(perm) - s) % 2
+
+
+def random_cubie(rng=random):
+    """
+    Uniformly random solvable cube: random permutations with equal parity,
+    random orientations with a twist sum of 0 (mod 3) and a flip sum of 0 (mod 2)
+    """
+    cube = CubieCube()
+    rng.shuffle(cube.cp)
+    rng.shuffle(cube.ep)
+    if _parity(cube.cp) != _parity(cube.ep):
+        cube.ep[10], cube.ep[11] = cube.ep[11], cube.ep[10]
+    cube.set_twist(rng.randrange(N_TWIST))
+    cube.set_flip(rng.randrange(N_FLIP))
+    return cube
+
+
+def random_states(n, seed=None):
+    """
+    Iterator of n uniformly random facelet tuples (Cube.state),
+    the same seed gives the same states
+    """
+    rng = random.Random(seed)
+    for i in range(n):
+        yield random_cubie(rng).to_state()
+
+
+class InvalidCube(ValueError):
+    """
+    A facelet state which is not a solvable cube
+    """
+
+
+def verify(state):
+    """
+    Cubies (CubieCube) of a facelet tuple (Cube.state),
+    raises InvalidCube if it can not be solved
+    """
+    if len(state) != 54:
+        raise InvalidCube(f'Expected 54 facelets, got {len(state)}')
+    if any(state.count(c) != 9 for c in range(6)):
+        raise InvalidCube('Every color must be on 9 facelets')
+    for k, side in enumerate(FACES):
+        if state[9 * k + 4] != SOLVED[9 * k + 4]:
+            raise InvalidCube(f'Wrong center color on side {side}')
+    try:
+        cube = CubieCube.from_state(state)
+    except ValueError as e:
+        raise InvalidCube(str(e)) from None
+    if len(set(cube.cp)) != 8:
+        raise InvalidCube('A corner is on the cube twice')
+    if len(set(cube.ep)) != 12:
+        raise InvalidCube('An edge is on the cube twice')
+    if sum(cube.co) % 3:
+        raise InvalidCube('A corner is twisted')
+    if sum(cube.eo) % 2:
+        raise InvalidCube('An edge is flipped')
+    if _parity(cube.cp) != _parity(cube.ep):
+        raise InvalidCube('Two pieces are swapped')
+    return cube
+
+
+def _move_cubes():
+    cubes = []
+    for name in MOVE_NAMES:
+        moved = tuple(SOLVED[i] for i in MOVES[name])
+        cubes.append(CubieCube.from_state(moved))
+    return cubes
+
+
+MOVE_CUBES = _move_cubes()
+
+
+def _perm_table(attr, moves):
+    """
+    Move table of the permutation coordinate of the first 8 corners or edges
+    """
+    perms = list(permutations(range(8)))
+    ranks = {p: i for i, p in enumerate(perms)}
+    table = array('H', bytes(2 * len(perms) * N_MOVE))
+    for m in moves:
+        mp = getattr(MOVE_CUBES[m], attr)[:8]
+        for c, perm in enumerate(perms):
+            table[c * N_MOVE + m] = ranks[tuple([perm[i] for i in mp])]
+    return table
+
+
+def _orientation_table(size, get, set):
+    """
+    Move table of the twist or the flip coordinate
+    """
+    table = array('H', bytes(2 * size * N_MOVE))
+    for c in range(size):
+        for m in range(N_MOVE):
+            cube = CubieCube()
+            set(cube, c)
+            cube.multiply(MOVE_CUBES[m])
+            table[c * N_MOVE + m] = get(cube)
+    return table
+
+
+def _edge_set_table(pieces):
+    """
+    Move table of the positions and the order of four edges
+    """
+    positions = []
+    for c in range(N_SLICE_SORTED):
+        ep = set_edge_set(c, pieces)
+        positions.append(tuple(ep.index(e) for e in pieces))
+    coords = {p: c for c, p in enumerate(positions)}
+    table = array('H', bytes(2 * N_SLICE_SORTED * N_MOVE))
+    for m in range(N_MOVE):
+        dest = [0] * 12
+        for i, j in enumerate(MOVE_CUBES[m].ep):
+            dest[j] = i
+        for c, p in enumerate(positions):
+            table[c * N_MOVE + m] = coords[tuple([dest[i] for i in p])]
+    return table
+
+
+def _corners_table():
+    return _perm_table('cp', range(N_MOVE))
+
+
+def _ud_edges_table():
+    # only the moves keeping the middle slice edges in the slice
+    return _perm_table('ep', PHASE2_MOVES)
+
+
+TABLE_BUILDERS = {'twist_move': lambda: _orientation_table(N_TWIST, CubieCube.get_twist, CubieCube.set_twist),
+                  'flip_move': lambda: _orientation_table(N_FLIP, CubieCube.get_flip, CubieCube.set_flip),
+                  'slice_sorted_move': lambda: _edge_set_table(SLICE_EDGES),
+                  'f_edges_move': lambda: _edge_set_table(F_EDGES),
+                  'b_edges_move': lambda: _edge_set_table(B_EDGES),
+                  'corners_move': _corners_table,
+                  'ud_edges_move': _ud_edges_table}
+
+
+def move_table(name):
+    """
+    Move table of a coordinate (loaded from the table cache),
+    the coordinate c after move m is table[N_MOVE * c + m]
+    """
+    return tables.load(name, 'H', TABLE_BUILDERS[name])
+
+
+class CoordCube:
+    """
+    Cube represented by the coordinates of its cubies,
+    every move is a lookup in the move tables
+    """
+    def __init__(self, cubie=None):
+        if cubie is None:
+            cubie = CubieCube()
+        self.twist = cubie.get_twist()
+        self.flip = cubie.get_flip()
+        self.slice_sorted = cubie.get_slice_sorted()
+        self.f_edges = cubie.get_f_edges()
+        self.b_edges = cubie.get_b_edges()
+        self.corners = cubie.get_corners()
+        self.twist_move = move_table('twist_move')
+        self.flip_move = move_table('flip_move')
+        self.slice_sorted_move = move_table('slice_sorted_move')
+        self.f_edges_move = move_table('f_edges_move')
+        self.b_edges_move = move_table('b_edges_move')
+        self.corners_move = move_table('corners_move')
+
+    def move(self, m):
+        self.twist = self.twist_move[N_MOVE * self.twist + m]
+        self.flip = self.flip_move[N_MOVE * self.flip + m]
+        self.slice_sorted = self.slice_sorted_move[N_MOVE * self.slice_sorted + m]
+        self.f_edges = self.f_edges_move[N_MOVE * self.f_edges + m]
+        self.b_edges = self.b_edges_move[N_MOVE * self.b_edges + m]
+        self.corners = self.corners_move[N_MOVE * self.corners + m]
+
+    def to_cubie(self):
+        """
+        CubieCube with these coordinates
+        """
+        cube = CubieCube()
+        cube.set_twist(self.twist)
+        cube.set_flip(self.flip)
+        cube.set_corners(self.corners)
+        ep = [-1] * 12
+        for pieces, coord in ((SLICE_EDGES, self.slice_sorted),
+                              (F_EDGES, self.f_edges),
+                              (B_EDGES, self.b_edges)):
+            for i, e in enumerate(set_edge_set(coord, pieces)):
+                if e in pieces:
+                    ep[i] = e
+        cube.ep = ep
+        return cube
@@ -0,0 +1,185 @@
+"""
+    Insert tables of the first two layers (white corners, second layer)
+
+    A piece to insert is in one of 24 cases (8 corner positions x 3 twists,
+    12 edge positions x 2 flips). For every slot, and every set of slots
+    already solved, INSERTS gives the shortest sequence (in quarter turns)
+    taking each case to its slot, made of the BACK turns and of the short
+    triggers (X B X', B' X' B X B Y B' Y', ...) that keep the white cross
+    and the solved slots in place. The solver looks the case up and applies
+    the answer, the cheapest slot first, instead of repeating an algorithm
+    until the piece happens to fit.
+
+    The tables are built once and kept in the table cache (cube.tables):
+    for every slot, set of solved slots and case, the index in TRIGGERS
+    of the first trigger of the sequence, the rest is the sequence of
+    the case that trigger leads to.
+"""
+
+from array import array
+from heapq import heappop, heappush
+from itertools import permutations, product
+
+from . import CORNERS, EDGES, MOVES, SOLVED, compose, inverse, tables
+
+
+CORNER_SLOTS = ('FUR', 'FUL', 'FDR', 'FDL')
+EDGE_SLOTS = ('UL', 'UR', 'DL', 'DR')
+
+SIDES = 'ULRD'
+TURNS = ('', '_', '2')
+
+# the white cross, kept by every corner insert
+CROSS = tuple(i for k in ('FU', 'FL', 'FD', 'FR') for i in EDGES[k])
+# the whole first layer, kept by every edge insert
+FIRST_LAYER = CROSS + tuple(i for k in CORNER_SLOTS for i in CORNERS[k])
+
+
+def _cost(moves):
+    return sum(2 if m[-1] == '2' else 1 for m in moves)
+
+
+def _anti(move):
+    return move[0] if move[-1] == '_' else move[0] + '_'
+
+
+def _triggers():
+    """
+    Candidate insert sequences: the BACK turns, X B X' (any turns of X and B)
+    and the second layer inserts B' X' B X B Y B' Y' (X, Y adjacent sides)
+    """
+    sequences = [[f'B{t}'] for t in TURNS]
+    for side, a, b in product(SIDES, TURNS[:2], TURNS):
+        x = f'{side}{a}'
+        sequences.append([x, f'B{b}', _anti(x)])
+    for x, y in product(SIDES, SIDES):
+        if x != y and y != {'U': 'D', 'D': 'U', 'L': 'R', 'R': 'L'}[x]:
+            sequences.append(['B_', f'{x}_', 'B', x, 'B', y, 'B_', f'{y}_'])
+            sequences.append(['B', y, 'B_', f'{y}_', 'B_', f'{x}_', 'B', x])
+    return [(moves, _cost(moves), compose(*(MOVES[m] for m in moves))) for moves in sequences]
+
+
+# (moves, cost, permutation, inverse permutation), the tables hold indexes
+# of this list: a change of the triggers needs new table names
+TRIGGERS = [(moves, cost, perm, inverse(perm)) for moves, cost, perm in _triggers()]
+
+# no sequence (the slot's piece can not be in this case)
+NONE = 255
+
+
+def _table(pieces, slot, kept):
+    """
+    First trigger (index in TRIGGERS) of the shortest sequence of every case
+    (facelets of the slot's piece) to the slot, using only the triggers
+    that keep the facelets kept
+    """
+    moves = [(t, cost, perm) for t, (m, cost, perm, _) in enumerate(TRIGGERS)
+             if all(perm[i] == i for i in kept)]
+    goal = pieces[slot]
+    best = {goal: 0}
+    first = {}
+    heap = [(0, goal)]
+    while heap:
+        # Dijkstra from the slot, backwards: the case moved to the slot by m
+        done, after = heappop(heap)
+        if done > best[after]:
+            continue
+        for t, cost, perm in moves:
+            case = tuple(perm[i] for i in after)
+            if case not in best or done + cost < best[case]:
+                best[case] = done + cost
+                first[case] = t
+                heappush(heap, (done + cost, case))
+    return first
+
+
+def _pieces(slots):
+    return CORNERS if slots == CORNER_SLOTS else EDGES
+
+
+# every case of the slots: the facelets of a piece, in any order
+CASES = {slots: {case: i for i, case in enumerate(c for facelets in _pieces(slots).values()
+                                                  for c in permutations(facelets))}
+         for slots in (CORNER_SLOTS, EDGE_SLOTS)}
+
+
+def _index(slots, slot, mask, case):
+    """
+    Index in the table of the slots of a case of a slot (index in slots),
+    with the slots of mask (bit i for slots[i]) solved
+    """
+    return ((slot << len(slots)) + mask) * len(CASES[slots]) + CASES[slots][case]
+
+
+def _build(slots, base):
+    pieces = _pieces(slots)
+    table = array('B', [NONE]) * ((len(slots) << len(slots)) * len(CASES[slots]))
+    for mask in range(1 << len(slots)):
+        kept = base + tuple(i for k, s in enumerate(slots) if mask >> k & 1 for i in pieces[s])
+        for slot, s in enumerate(slots):
+            if not mask >> slot & 1:
+                for case, t in _table(pieces, s, kept).items():
+                    table[_index(slots, slot, mask, case)] = t
+    return table
+
+
+BUILDERS = {CORNER_SLOTS: ('corner_inserts', CROSS),
+            EDGE_SLOTS: ('edge_inserts', FIRST_LAYER)}
+
+
+def insert_table(slots):
+    """
+    Insert table of CORNER_SLOTS or EDGE_SLOTS (loaded from the table cache)
+    """
+    name, base = BUILDERS[slots]
+    return tables.load(name, 'B', lambda: _build(slots, base))
+
+
+def solved_slots(state, slots):
+    pieces = _pieces(slots)
+    return frozenset(s for s in slots if all(state[i] == SOLVED[i] for i in pieces[s]))
+
+
+def case(state, pieces, slot):
+    """
+    Facelets of the piece of the slot (in the order of the slot's facelets)
+    """
+    colors = [SOLVED[i] for i in pieces[slot]]
+    for facelets in pieces.values():
+        found = [state[i] for i in facelets]
+        if sorted(found) == sorted(colors):
+            return tuple(facelets[found.index(c)] for c in colors)
+    raise ValueError(f'No piece for the slot {slot}')
+
+
+def _sequence(table, slots, slot, mask, current):
+    """
+    Moves taking the piece at the facelets current to the slot (index in slots)
+    """
+    goal = _pieces(slots)[slots[slot]]
+    moves = []
+    while current != goal:
+        t = table[_index(slots, slot, mask, current)]
+        if t == NONE:
+            raise ValueError(f'No insert for the slot {slots[slot]}')
+        m, cost, perm, back = TRIGGERS[t]
+        moves += m
+        # the facelets the trigger takes the piece to
+        current = tuple(back[i] for i in current)
+    return moves
+
+
+def next_insert(state, slots):
+    """
+    Moves ('B', 'U_', ...) solving the cheapest unsolved slot
+    (CORNER_SLOTS or EDGE_SLOTS), None once every slot is solved
+    """
+    table = insert_table(slots)
+    pieces = _pieces(slots)
+    solved = solved_slots(state, slots)
+    mask = sum(1 << i for i, s in enumerate(slots) if s in solved)
+    options = [_sequence(table, slots, i, mask, case(state, pieces, s))
+               for i, s in enumerate(slots) if s not in solved]
+    if not options:
+        return None
+    return min(options, key=_cost)
@@ -0,0 +1,121 @@
+"""
+    Standard notation ("R U R' U2", wide and slice moves, rotations)
+
+    A sequence is compiled once into the face turns it is made of and their
+    single composite permutation, later uses of the same text are a cache
+    lookup: Cube.play(text) applies it with one gather, CubeBatch.play(text)
+    with one fancy indexing of the whole batch.
+
+    The cube keeps its centers in place (FRONT is always White): a slice
+    move is the two face turns around it and a rotation of the whole cube,
+    a rotation only changes the sides the next moves refer to. So "M" turns
+    R L' and the moves after it are read from the cube seen after x'.
+
+    Moves: U D L R F B, their wide turns Uw ... Bw (or u d l r f b),
+    the slices M E S and the rotations x y z, each followed by nothing
+    (clockwise), ' (anti clockwise) or 2 (half turn).
+"""
+
+from collections import OrderedDict
+import re
+
+from . import FACES, MOVES, build_macro, compose
+from .symmetry import PERMS, FACE_MAPS, DETERMINANTS
+
+
+TOKEN = re.compile(r"\s*(?:([UDLRFB]w|[UDLRFBMESxyzudlrfb])(2'|'2|2|'|_)?\s*|(\S))")
+
+AMOUNTS = {None: 1, "'": -1, '_': -1, '2': 2, "2'": 2, "'2": 2}
+
+
+def _rotation(side):
+    """
+    Symmetry (index in cube.symmetry) turning the whole cube like a turn of side
+    """
+    move = MOVES[side]
+    for sym, perm in enumerate(PERMS):
+        if DETERMINANTS[sym] == 1 and all(perm[i] == j for i, j in enumerate(move) if i != j):
+            return sym
+    raise ValueError(f'No rotation turning like {side}')
+
+
+ROTATIONS = {'x': _rotation('R'), 'y': _rotation('U'), 'z': _rotation('F')}
+
+# (side, direction) face turns and (rotation, direction) of a move,
+# the directions are multiplied by the amount of the move
+EXPANSIONS = {side: ([(side, 1)], []) for side in FACES}
+EXPANSIONS.update({
+    'M': ([('R', 1), ('L', -1)], [('x', -1)]),
+    'E': ([('U', 1), ('D', -1)], [('y', -1)]),
+    'S': ([('F', -1), ('B', 1)], [('z', 1)]),
+    'Rw': ([('L', 1)], [('x', 1)]), 'Lw': ([('R', 1)], [('x', -1)]),
+    'Uw': ([('D', 1)], [('y', 1)]), 'Dw': ([('U', 1)], [('y', -1)]),
+    'Fw': ([('B', 1)], [('z', 1)]), 'Bw': ([('F', 1)], [('z', -1)]),
+    'x': ([], [('x', 1)]), 'y': ([], [('y', 1)]), 'z': ([], [('z', 1)])})
+for _side in FACES:
+    EXPANSIONS[_side.lower()] = EXPANSIONS[f'{_side}w']
+
+
+def _turn(side, amount):
+    return side + {1: '', 2: '2', 3: '_'}[amount % 4]
+
+
+def parse(text):
+    """
+    Face turns ('R', 'U_', 'F2', ...) of a sequence in standard notation,
+    with the centers kept in place. Raises ValueError on an unknown move
+    """
+    # orient[i]: the side of the cube seen on side FACES[i]
+    orient = list(range(6))
+    moves = []
+    for match in TOKEN.finditer(text):
+        move, suffix, unknown = match.groups()
+        if unknown is not None:
+            raise ValueError(f'Unknown move at {match.start(3)}: {text[match.start(3):].split()[0]!r}')
+        amount = AMOUNTS[suffix]
+        turns, rotations = EXPANSIONS[move]
+        for side, direction in turns:
+            moves.append(_turn(FACES[orient[FACES.index(side)]], direction * amount))
+        for axis, direction in rotations:
+            face_map = FACE_MAPS[ROTATIONS[axis]]
+            for i in range((direction * amount) % 4):
+                moved = [0] * 6
+                for j in range(6):
+                    moved[face_map[j]] = orient[j]
+                orient = moved
+    return tuple(moves)
+
+
+class Sequence:
+    """
+    A compiled sequence of moves in standard notation
+    """
+    def __init__(self, text):
+        self.text = text
+        self.moves = parse(text)
+        self.perm = compose(*(MOVES[m] for m in self.moves))
+        self.macro = build_macro(self.moves)
+
+    def __len__(self):
+        return len(self.moves)
+
+    def __repr__(self):
+        return f'Sequence({self.text!r})'
+
+
+MAX_COMPILED = 4096
+_compiled = OrderedDict()
+
+
+def compile_moves(text):
+    """
+    Compiled Sequence of the text, from a cache of the last MAX_COMPILED texts
+    """
+    sequence = _compiled.get(text)
+    if sequence is None:
+        sequence = _compiled[text] = Sequence(text)
+        if len(_compiled) > MAX_COMPILED:
+            _compiled.popitem(last=False)
+    else:
+        _compiled.move_to_end(text)
+    return sequence
@@ -0,0 +1,235 @@
+"""
+    Optimal Solver (IDA* with pattern databases)
+
+    Finds a shortest solution in the half turn metric (HTM, a half turn is
+    one move, the 18 moves of cube.cubie) or in the quarter turn metric
+    (QTM, a half turn is two quarter turns, only the 12 quarter moves).
+
+    The search is an iterative deepening A* over the cubie coordinates,
+    the lower bound of the moves left is the largest distance given by
+    the pattern databases (pruning tables built by breadth first search,
+    one set per metric, in the table cache):
+        orientation of the corners and positions of the slice edges,
+        orientation of the edges and positions of the slice edges,
+        permutation of the corners,
+        positions and order of the FRONT, BACK and slice edges.
+    These tables fit a pure Python build (a few seconds each), cubes up
+    to about 11 moves from solved take seconds, every further move costs
+    about 20 times more: a random cube (18 moves for most of them) is out
+    of reach, give the search a timeout.
+"""
+
+from . import tables
+from .cubie import (CubieCube, verify, move_table, N_MOVE, N_TWIST, N_FLIP, N_SLICE,
+                    N_CORNERS, N_SLICE_SORTED)
+from .two_phase import OPPOSITE, TreeSearch, _bfs, _slice_move, pruning_table
+
+
+METRICS = {'htm': tuple(range(N_MOVE)),
+           'qtm': tuple(m for m in range(N_MOVE) if m % 3 != 1)}
+
+# coordinates of the solved cube: twist, flip, slice_sorted, corners, f_edges, b_edges
+SOLVED = (0, 0, 0, 0, CubieCube().get_f_edges(), CubieCube().get_b_edges())
+
+
+def _single(move, size, start, moves):
+    """
+    Pruning table of a single coordinate, distance from start
+    """
+    return _bfs(move, [0] * N_MOVE, 1, size, moves, start)
+
+
+def _builders(metric):
+    moves = METRICS[metric]
+    return {f'slice_twist_{metric}_prun': lambda: _bfs(_slice_move(), move_table('twist_move'),
+                                                       N_TWIST, N_SLICE * N_TWIST, moves),
+            f'slice_flip_{metric}_prun': lambda: _bfs(_slice_move(), move_table('flip_move'),
+                                                      N_FLIP, N_SLICE * N_FLIP, moves),
+            f'corners_{metric}_prun': lambda: _single(move_table('corners_move'), N_CORNERS, 0, moves),
+            f'slice_sorted_{metric}_prun': lambda: _single(move_table('slice_sorted_move'),
+                                                           N_SLICE_SORTED, 0, moves),
+            f'f_edges_{metric}_prun': lambda: _single(move_table('f_edges_move'), N_SLICE_SORTED,
+                                                      SOLVED[4], moves),
+            f'b_edges_{metric}_prun': lambda: _single(move_table('b_edges_move'), N_SLICE_SORTED,
+                                                      SOLVED[5], moves)}
+
+
+PRUNING_BUILDERS = {**_builders('htm'), **_builders('qtm')}
+
+
+def optimal_table(name):
+    """
+    Pattern database of the optimal search (loaded from the table cache)
+    """
+    if name in ('slice_twist_htm_prun', 'slice_flip_htm_prun'):
+        # the same as the phase 1 tables of the two phase solver
+        return pruning_table(name.replace('_htm', ''))
+    return tables.load(name, 'B', PRUNING_BUILDERS[name])
+
+
+class OptimalSearch(TreeSearch):
+    """
+    IDA* search for a shortest solution in one metric
+    """
+    name = 'Optimal'
+
+    def __init__(self, metric='htm'):
+        super().__init__()
+        if metric not in METRICS:
+            raise ValueError(f'Unknown metric {metric!r}')
+        self.metric = metric
+        self.moves = METRICS[metric]
+        self.twist_move = move_table('twist_move')
+        self.flip_move = move_table('flip_move')
+        self.slice_sorted_move = move_table('slice_sorted_move')
+        self.corners_move = move_table('corners_move')
+        self.f_edges_move = move_table('f_edges_move')
+        self.b_edges_move = move_table('b_edges_move')
+        self.slice_twist_prun = optimal_table(f'slice_twist_{metric}_prun')
+        self.slice_flip_prun = optimal_table(f'slice_flip_{metric}_prun')
+        self.corners_prun = optimal_table(f'corners_{metric}_prun')
+        self.slice_sorted_prun = optimal_table(f'slice_sorted_{metric}_prun')
+        self.f_edges_prun = optimal_table(f'f_edges_{metric}_prun')
+        self.b_edges_prun = optimal_table(f'b_edges_{metric}_prun')
+
+    def start(self, cubie, timeout=None, nodes=None):
+        """
+        Set up the search of the cubie cube, returns its coordinates
+        and the first depth to search
+        """
+        self.reset(timeout, nodes)
+        coords = (cubie.get_twist(), cubie.get_flip(), cubie.get_slice_sorted(),
+                  cubie.get_corners(), cubie.get_f_edges(), cubie.get_b_edges())
+        depth = self.bound(*coords)
+        if self.metric == 'qtm' and depth % 2 != cubie.corner_parity():
+            # every quarter turn changes the parity of the corner permutation
+            depth += 1
+        return coords, depth
+
+    @property
+    def depth_step(self):
+        return 2 if self.metric == 'qtm' else 1
+
+    def allowed(self, m, last, last2):
+        """
+        False if move m after the moves last2, last is skipped by the search
+        (the same rules as in search())
+        """
+        if last < 0:
+            return True
+        side, last_side = m // 3, last // 3
+        if side == OPPOSITE[last_side] and side < last_side:
+            return False
+        if side == last_side:
+            return self.metric == 'qtm' and m == last and m % 3 == 0 and last2 != m
+        return True
+
+    def move(self, coords, m):
+        twist, flip, slice_sorted, corners, f_edges, b_edges = coords
+        return (self.twist_move[N_MOVE * twist + m], self.flip_move[N_MOVE * flip + m],
+                self.slice_sorted_move[N_MOVE * slice_sorted + m], self.corners_move[N_MOVE * corners + m],
+                self.f_edges_move[N_MOVE * f_edges + m], self.b_edges_move[N_MOVE * b_edges + m])
+
+    def bound(self, twist, flip, slice_sorted, corners, f_edges, b_edges):
+        """
+        Lower bound of the moves solving the coordinates
+        """
+        s = slice_sorted // 24
+        return max(self.slice_twist_prun[s * N_TWIST + twist], self.slice_flip_prun[s * N_FLIP + flip],
+                   self.corners_prun[corners], self.slice_sorted_prun[slice_sorted],
+                   self.f_edges_prun[f_edges], self.b_edges_prun[b_edges])
+
+    def solve(self, cubie, max_length=None, timeout=None, nodes=None):
+        """
+        Shortest list of moves solving the cubie cube (None if longer than max_length)
+        """
+        coords, depth = self.start(cubie, timeout, nodes)
+        while max_length is None or depth <= max_length:
+            if depth == 0 or self.search(*coords, depth, -1, -1):
+                return self.path
+            depth += self.depth_step
+        return None
+
+    def subtree(self, cubie, prefix, depth):
+        """
+        Solution of depth moves starting with the moves of prefix, or None
+        (the part of solve() done by one worker of a parallel search)
+        """
+        coords, _ = self.start(cubie)
+        for i, m in enumerate(prefix):
+            coords = self.move(coords, m)
+            if self.bound(*coords) > depth - i - 1:
+                return None
+        self.path = list(prefix)
+        togo = depth - len(prefix)
+        if togo == 0:
+            return self.path if coords == SOLVED else None
+        last2 = prefix[-2] if len(prefix) > 1 else -1
+        return self.path if self.search(*coords, togo, prefix[-1], last2) else None
+
+    def search(self, twist, flip, slice_sorted, corners, f_edges, b_edges, togo, last, last2):
+        """
+        Depth first search of the solutions with togo more moves, after
+        the moves last and last2 (the move before it), -1 for none
+        """
+        self.nodes += 1
+        if self.nodes >= self.next_poll:
+            self.poll()
+        twist_move, flip_move, slice_sorted_move = self.twist_move, self.flip_move, self.slice_sorted_move
+        corners_move, f_edges_move, b_edges_move = self.corners_move, self.f_edges_move, self.b_edges_move
+        slice_twist_prun, slice_flip_prun = self.slice_twist_prun, self.slice_flip_prun
+        corners_prun, slice_sorted_prun = self.corners_prun, self.slice_sorted_prun
+        f_edges_prun, b_edges_prun = self.f_edges_prun, self.b_edges_prun
+        path = self.path
+        qtm = self.metric == 'qtm'
+        last_side = last // 3
+        for m in self.moves:
+            side = m // 3
+            if last >= 0:
+                if side == OPPOSITE[last_side] and side < last_side:
+                    continue
+                if side == last_side:
+                    # htm: never twice the same side, qtm: only X X (not X X X, X X', X' X')
+                    if not qtm or m != last or m % 3 == 2 or last2 == m:
+                        continue
+            sl = slice_sorted_move[N_MOVE * slice_sorted + m]
+            tw = twist_move[N_MOVE * twist + m]
+            s = sl // 24
+            if slice_twist_prun[s * N_TWIST + tw] >= togo:
+                continue
+            fl = flip_move[N_MOVE * flip + m]
+            if slice_flip_prun[s * N_FLIP + fl] >= togo:
+                continue
+            co = corners_move[N_MOVE * corners + m]
+            if corners_prun[co] >= togo or slice_sorted_prun[sl] >= togo:
+                continue
+            fe = f_edges_move[N_MOVE * f_edges + m]
+            if f_edges_prun[fe] >= togo:
+                continue
+            be = b_edges_move[N_MOVE * b_edges + m]
+            if b_edges_prun[be] >= togo:
+                continue
+            path.append(m)
+            if togo == 1:
+                if (tw, fl, sl, co, fe, be) == SOLVED:
+                    return True
+            elif self.search(tw, fl, sl, co, fe, be, togo - 1, m, last):
+                return True
+            path.pop()
+        return False
+
+
+_searches = {}
+
+
+def solve(state, metric='htm', max_length=None, timeout=None):
+    """
+    Shortest solution (list of moves 0 ... 17) of a facelet tuple (Cube.state),
+    in the half turn ('htm') or quarter turn ('qtm') metric
+    """
+    if metric not in _searches:
+        _searches[metric] = OptimalSearch(metric)
+    moves = _searches[metric].solve(verify(state), max_length, timeout)
+    if moves is None:
+        raise ValueError(f'No solution with at most {max_length} moves')
+    return list(moves)
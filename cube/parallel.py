@@ -0,0 +1,160 @@
+"""
+    Parallel tree search of the search based solvers (two_phase, optimal)
+
+    Every iteration of the search (one depth of IDA*, one phase 1 depth of
+    the two phase search) is split into the subtrees of its first moves
+    (first two moves for the optimal search), searched by a pool of worker
+    processes. The workers share one value: the length of the solution found
+    in the iteration. Once it is set every worker stops its subtree (within
+    about a thousand nodes), so a solution found by one worker prunes the
+    search of all the others, and the pool is free for the next cube.
+
+    search = ParallelSearch('optimal', workers=8)
+    moves = search.solve(state, timeout=60)
+    search.close()
+"""
+
+from multiprocessing import get_context, TimeoutError
+from os import cpu_count
+from time import perf_counter
+
+from .cubie import verify, N_MOVE
+from .two_phase import SearchStopped, SolveTimeout
+
+
+SEARCH_METHODS = ('two_phase', 'optimal', 'optimal_qtm')
+
+_search = None
+_searches = {}
+
+
+def new_search(method):
+    """
+    Tree search (two_phase.Search, optimal.OptimalSearch) of a solving method
+    """
+    if method == 'two_phase':
+        from .two_phase import Search
+        return Search()
+    if method in ('optimal', 'optimal_qtm'):
+        from .optimal import OptimalSearch
+        return OptimalSearch('qtm' if method == 'optimal_qtm' else 'htm')
+    raise ValueError(f'No tree search for the method {method!r}')
+
+
+def method_search(method):
+    """
+    Tree search of a solving method, made once per process
+    """
+    if method not in _searches:
+        _searches[method] = new_search(method)
+    return _searches[method]
+
+
+def _init_worker(method, stop):
+    global _search
+    _search = new_search(method)
+    _search.stop = stop
+
+
+def _subtree(job):
+    if _search.stop.value:
+        return None
+    try:
+        return _search.subtree(*job)
+    except SearchStopped:
+        return None
+
+
+class ParallelSearch:
+    """
+    Pool of worker processes searching the subtrees of one cube at a time
+    """
+    def __init__(self, method='optimal', workers=None):
+        self.method = method
+        self.workers = workers or cpu_count() or 1
+        self.search = new_search(method)
+        context = get_context()
+        self.stop = context.Value('i', 0)
+        self.pool = context.Pool(self.workers, initializer=_init_worker, initargs=(method, self.stop))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+    def solve(self, state, max_length=None, timeout=None):
+        """
+        Solution (list of moves 0 ... 17) of a facelet tuple (Cube.state),
+        the shortest one for the optimal methods
+        """
+        cubie = verify(state)
+        deadline = None if timeout is None else perf_counter() + timeout
+        search = self.search
+        if self.method == 'two_phase':
+            if max_length is None:
+                max_length = 22
+            (twist, flip, slice_sorted, corners), depth = search.start(cubie, max_length)
+            if depth == 0:
+                if search.start_phase2(corners, slice_sorted, -1):
+                    return search.path
+                depth = 1
+            step = 1
+        else:
+            coords, depth = search.start(cubie)
+            if depth == 0:
+                return []
+            step = search.depth_step
+        while max_length is None or depth <= max_length:
+            moves = self.run(self.jobs(cubie, depth, max_length), deadline)
+            if moves is not None:
+                return moves
+            depth += step
+        raise ValueError(f'No solution with at most {max_length} moves')
+
+    def jobs(self, cubie, depth, max_length):
+        """
+        Subtrees of one iteration of the search, arguments of subtree()
+        """
+        if self.method == 'two_phase':
+            return [(cubie, max_length, m, depth) for m in range(N_MOVE)]
+        moves, allowed = self.search.moves, self.search.allowed
+        if depth == 1:
+            return [(cubie, (m,), depth) for m in moves]
+        return [(cubie, (m1, m2), depth) for m1 in moves for m2 in moves if allowed(m2, m1, -1)]
+
+    def run(self, jobs, deadline):
+        """
+        Search the subtrees of the jobs, the first solution found (or None)
+        """
+        self.stop.value = 0
+        results = self.pool.imap_unordered(_subtree, jobs)
+        found = None
+        try:
+            for i in range(len(jobs)):
+                timeout = None if deadline is None else max(0.0, deadline - perf_counter())
+                moves = results.next(timeout)
+                if moves is not None and found is None:
+                    found = moves
+                    # the other workers stop their subtrees
+                    self.stop.value = len(moves)
+        except TimeoutError:
+            self.stop.value = -1
+            # every remaining job returns at once, the pool is ready for the next cube
+            for moves in results:
+                pass
+            raise SolveTimeout('Parallel search timed out') from None
+        return found
+
+
+def solve(state, method='optimal', workers=None, max_length=None, timeout=None):
+    """
+    Solution of a facelet tuple (Cube.state) by a parallel search
+    on a new pool of workers
+    """
+    with ParallelSearch(method, workers) as search:
+        return search.solve(state, max_length, timeout)
@@ -0,0 +1,312 @@
+"""
+    Local solve service: JSON lines over TCP or a Unix socket
+
+    python -m cube.service [--host 127.0.0.1] [--port 8765] [--unix PATH]
+                           [--workers N] [--batch 32] [--delay 0.002]
+                           [--queue 1024] [--timeout 10]
+                           [--method cfop] [--methods cfop,two_phase]
+
+    Every request line is a JSON object
+        {"id": 1, "state": ..., "method": "cfop", "timeout": 5}
+    where state is anything solve_many accepts (a Cube.cube dict,
+    a list of 54 facelet colors or a 54 characters string), method and
+    timeout are optional: method is one of --methods (default: --method
+    only), timeout at most --timeout (its default). Every answer line is
+        {"id": 1, "solution": [1, -2, ...]}  or  {"id": 1, "error": "..."}
+    Answers are written as soon as they are ready, not in request order,
+    a client can send many requests before reading the answers.
+
+    Requests waiting in the queue are grouped into micro batches (up to
+    --batch requests, waiting at most --delay seconds for more) solved by
+    a pool of worker processes, at most one batch per worker at a time.
+    When --queue requests are waiting, the server stops reading the
+    connections until the workers catch up (backpressure).
+    A request is answered with "timeout" after its timeout, and its solve
+    stops at the same deadline in the worker (cube.SolveBudget), so it does
+    not hold the worker for the next requests.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .batch import METHODS, init_worker, solve_job, to_state
+from .budget import SolveBudgetExceeded
+from .cubie import verify
+
+
+def solve_batch(jobs):
+    """
+    Solutions (or exceptions) of a list of (state, method, deadline), in a worker,
+    deadline is a time.time() the solve stops at
+    """
+    results = []
+    for i, (state, method, deadline) in enumerate(jobs):
+        seconds = deadline - time.time()
+        if seconds <= 0:
+            results.append(SolveBudgetExceeded('timeout'))
+        else:
+            results.append(solve_job((i, state, method, True, seconds))[1])
+    return results
+
+
+class SolveServer:
+    """
+    Micro batching asyncio server over a pool of worker processes
+    """
+    def __init__(self, workers=None, batch_size=32, batch_delay=0.002, queue_size=1024,
+                 timeout=10.0, method='cfop', methods=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.timeout = timeout
+        self.method = method
+        # the methods a request may ask for
+        self.methods = tuple(methods or (method,))
+        if method not in self.methods:
+            self.methods += (method,)
+        self.queue = asyncio.Queue(queue_size)
+        self.slots = asyncio.Semaphore(self.workers)
+        self.pool = None
+        self.batcher = None
+        self.server = None
+        self.connections = {}
+        self.solved = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.batches = 0
+
+    async def start(self, host='127.0.0.1', port=8765, path=None):
+        self.pool = ProcessPoolExecutor(self.workers, initializer=init_worker, initargs=self.methods)
+        self.batcher = asyncio.ensure_future(self.run_batches())
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self.handle, path)
+        else:
+            self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        # end the connections with EOF, their pending answers are dropped
+        for writer in self.connections.values():
+            writer.close()
+        if self.connections:
+            await asyncio.wait(list(self.connections))
+        if self.batcher is not None:
+            self.batcher.cancel()
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+
+    def info(self):
+        return {'solved': self.solved, 'failed': self.failed, 'timeouts': self.timeouts,
+                'batches': self.batches, 'queued': self.queue.qsize(), 'workers': self.workers}
+
+    async def solve(self, state, method=None, timeout=None):
+        """
+        Solution of a state (Cube.rotates), solved in the next batch,
+        raises ValueError for a method not in self.methods
+        """
+        method = method or self.method
+        if method not in self.methods:
+            raise ValueError(f'Method {method!r} is not served, use one of {", ".join(self.methods)}')
+        timeout = min(timeout, self.timeout) if timeout else self.timeout
+        try:
+            return await asyncio.wait_for(self.submit(state, method, time.time() + timeout), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+
+    async def submit(self, state, method, deadline):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((state, method, deadline, future))
+        return await future
+
+    async def run_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            jobs = [await self.queue.get()]
+            deadline = loop.time() + self.batch_delay
+            while len(jobs) < self.batch_size:
+                try:
+                    jobs.append(await asyncio.wait_for(self.queue.get(), deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    break
+            # requests given up while waiting are not solved
+            jobs = [job for job in jobs if not job[3].done()]
+            if not jobs:
+                continue
+            await self.slots.acquire()
+            asyncio.ensure_future(self.run_batch(jobs))
+
+    async def run_batch(self, jobs):
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(self.pool, solve_batch, [job[:3] for job in jobs])
+        except Exception as e:
+            results = [e] * len(jobs)
+        finally:
+            self.slots.release()
+        self.batches += 1
+        for (state, method, deadline, future), result in zip(jobs, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                self.failed += 1
+                future.set_exception(result)
+            else:
+                self.solved += 1
+                future.set_result(result)
+
+    async def answer(self, request, writer):
+        try:
+            request = json.loads(request)
+            if request.get('info'):
+                reply = {'info': self.info()}
+            else:
+                # impossible cubes are answered at once, without a worker
+                state = to_state(request['state'])
+                verify(state)
+                solution = await self.solve(state, request.get('method'), request.get('timeout'))
+                reply = {'solution': solution}
+        except asyncio.TimeoutError:
+            reply = {'error': 'timeout'}
+        except Exception as e:
+            reply = {'error': str(e) or type(e).__name__}
+        if isinstance(request, dict) and 'id' in request:
+            reply['id'] = request['id']
+        writer.write(json.dumps(reply).encode() + b'\n')
+
+    async def handle(self, reader, writer):
+        tasks = set()
+        self.connections[asyncio.current_task()] = writer
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                task = asyncio.ensure_future(self.answer(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                # backpressure: stop reading while the queue is full
+                while self.queue.full():
+                    await asyncio.sleep(self.batch_delay)
+                await writer.drain()
+            if tasks:
+                await asyncio.wait(tasks)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+            del self.connections[asyncio.current_task()]
+
+
+class SolveClient:
+    """
+    asyncio client of a SolveServer, many requests can be awaited at once
+    """
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.pending = {}
+        self.next_id = 0
+        self.receiver = asyncio.ensure_future(self.receive())
+
+    @classmethod
+    async def connect(cls, host='127.0.0.1', port=8765, path=None):
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def receive(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            reply = json.loads(line)
+            future = self.pending.pop(reply.get('id'), None)
+            if future is not None and not future.done():
+                future.set_result(reply)
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError('Connection closed by the server'))
+
+    async def request(self, request):
+        self.next_id += 1
+        request['id'] = self.next_id
+        future = asyncio.get_running_loop().create_future()
+        self.pending[self.next_id] = future
+        self.writer.write(json.dumps(request).encode() + b'\n')
+        await self.writer.drain()
+        return await future
+
+    async def solve(self, state, method=None, timeout=None):
+        """
+        Solution of the state, raises RuntimeError with the error of the server
+        """
+        request = {'state': list(state) if isinstance(state, tuple) else state}
+        if method is not None:
+            request['method'] = method
+        if timeout is not None:
+            request['timeout'] = timeout
+        reply = await self.request(request)
+        if 'error' in reply:
+            raise RuntimeError(reply['error'])
+        return reply['solution']
+
+    async def info(self):
+        return (await self.request({'info': True}))['info']
+
+    async def close(self):
+        self.receiver.cancel()
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def serve(args):
+    methods = args.methods.split(',') if args.methods else None
+    server = SolveServer(args.workers, args.batch, args.delay, args.queue, args.timeout, args.method, methods)
+    await server.start(args.host, args.port, args.unix)
+    where = args.unix or f'{args.host}:{args.port}'
+    print(f'Solving on {where} with {server.workers} workers', flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m cube.service', description='Local solve service.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', default=None, help='Unix socket path (instead of TCP)')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--batch', type=int, default=32, help='most requests in a batch')
+    parser.add_argument('--delay', type=float, default=0.002, help='seconds waiting for a batch to fill')
+    parser.add_argument('--queue', type=int, default=1024, help='most requests waiting for a worker')
+    parser.add_argument('--timeout', type=float, default=10.0, help='default (and most) seconds per request')
+    parser.add_argument('--method', default='cfop', choices=METHODS, help='method of the requests without one')
+    parser.add_argument('--methods', default=None,
+                        help='comma separated methods a request may ask for (default: --method only)')
+    args = parser.parse_args(argv)
+    if args.methods and not set(args.methods.split(',')) <= set(METHODS):
+        parser.error(f'--methods must be among {", ".join(METHODS)}')
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
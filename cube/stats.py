@@ -0,0 +1,40 @@
+"""
+    Instrumentation of Cube.solve()
+
+    A SolveStats given to Cube.solve(stats=...) records, for every stage
+    of the solver (daisy, white_cross, ..., orient_corners), its wall time,
+    the moves it emitted before and after optimize_rotates, and the
+    iterations of its loops. The stats of the last solve stay readable
+    after it, and the callback (if any) is called with them after every solve.
+"""
+
+from . import optimize_rotates
+
+
+class SolveStats:
+    """
+    Per stage time, moves and loop iterations of a solve
+    """
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.reset()
+
+    def reset(self):
+        self.stages = {}
+        self.seconds = 0.0
+        self.moves = 0
+
+    def record(self, name, seconds, moves, iterations):
+        self.stages[name] = {'seconds': seconds,
+                             'moves': len(moves),
+                             'optimized_moves': len(optimize_rotates(moves)),
+                             'iterations': iterations}
+
+    def finish(self, seconds, moves):
+        self.seconds = seconds
+        self.moves = moves
+        if self.callback is not None:
+            self.callback(self)
+
+    def as_dict(self):
+        return {'seconds': self.seconds, 'moves': self.moves, 'stages': self.stages}
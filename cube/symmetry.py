@@ -0,0 +1,122 @@
+"""
+    Symmetries of the cube
+
+    The 48 symmetries (24 rotations of the whole cube, with or without a
+    mirror) are found from the position and the direction of every facelet,
+    with the axes x (LEFT to RIGHT), y (DOWN to UP) and z (BACK to FRONT).
+
+    A symmetry moves the facelets and relabels the colors with the sides
+    they are moved to (the FRONT color is still White, UP Green, ...),
+    so every state has up to 48 symmetric states solved by the symmetric
+    solution. canonical() gives the smallest of them, which represents
+    all of them in caches and lookup tables.
+"""
+
+from itertools import permutations, product
+from operator import itemgetter
+
+from . import FACES
+
+
+# direction of the side, and of the rows and the columns of its facelets
+LAYOUT = {'F': ((0, 0, 1), (0, -1, 0), (1, 0, 0)),
+          'U': ((0, 1, 0), (0, 0, 1), (1, 0, 0)),
+          'L': ((-1, 0, 0), (0, -1, 0), (0, 0, 1)),
+          'R': ((1, 0, 0), (0, -1, 0), (0, 0, -1)),
+          'D': ((0, -1, 0), (0, 0, -1), (1, 0, 0)),
+          'B': ((0, 0, -1), (0, 1, 0), (1, 0, 0))}
+
+
+def facelet_positions():
+    """
+    (position, direction) of every facelet, by index in Cube.state
+    """
+    positions = []
+    for side in FACES:
+        normal, row, col = LAYOUT[side]
+        for i in range(3):
+            for j in range(3):
+                pos = tuple(n + (i - 1) * r + (j - 1) * c for n, r, c in zip(normal, row, col))
+                positions.append((pos, normal))
+    return positions
+
+
+POSITIONS = facelet_positions()
+INDEX = {p: i for i, p in enumerate(POSITIONS)}
+
+
+def apply_matrix(matrix, v):
+    return tuple(sum(m * x for m, x in zip(row, v)) for row in matrix)
+
+
+def matrix_permutation(matrix):
+    """
+    Facelet permutation (new_state[i] = state[perm[i]]) moving
+    every facelet by the matrix
+    """
+    perm = [0] * 54
+    for i, (pos, normal) in enumerate(POSITIONS):
+        perm[INDEX[apply_matrix(matrix, pos), apply_matrix(matrix, normal)]] = i
+    return tuple(perm)
+
+
+def _matrices():
+    """
+    The 48 symmetry matrices (signed permutations of the axes), identity first
+    """
+    matrices = []
+    for perm in permutations(range(3)):
+        for signs in product((1, -1), repeat=3):
+            matrices.append(tuple(tuple(signs[i] if j == perm[i] else 0 for j in range(3))
+                                  for i in range(3)))
+    return matrices
+
+
+def _determinant(m):
+    return (m[0][0] * (m[1][1] * m[2][2] - m[1][2] * m[2][1])
+            - m[0][1] * (m[1][0] * m[2][2] - m[1][2] * m[2][0])
+            + m[0][2] * (m[1][0] * m[2][1] - m[1][1] * m[2][0]))
+
+
+MATRICES = _matrices()
+PERMS = [matrix_permutation(m) for m in MATRICES]
+GATHER = [itemgetter(*p) for p in PERMS]
+# side (index in FACES) each side is moved to
+NORMALS = [LAYOUT[side][0] for side in FACES]
+FACE_MAPS = [[NORMALS.index(apply_matrix(m, n)) for n in NORMALS] for m in MATRICES]
+# +1 for rotations, -1 for mirrors (they reverse the direction of the turns)
+DETERMINANTS = [_determinant(m) for m in MATRICES]
+INVERSE = [MATRICES.index(tuple(zip(*m))) for m in MATRICES]
+# color relabeling of every symmetry, for bytes.translate
+COLOR_TABLES = [bytes(f) + bytes(range(6, 256)) for f in FACE_MAPS]
+
+
+def transform(state, sym):
+    """
+    Symmetric state (facelet tuple) of a state
+    """
+    face_map = FACE_MAPS[sym]
+    return tuple(face_map[c] for c in GATHER[sym](state))
+
+
+def transform_rotates(rotates, sym):
+    """
+    Symmetric solution: solves transform(state, sym) when rotates solves state
+    """
+    face_map, det = FACE_MAPS[sym], DETERMINANTS[sym]
+    return [(face_map[abs(r) - 1] + 1) * (det if r > 0 else -det) for r in rotates]
+
+
+def canonical(state):
+    """
+    (canonical state, sym) where canonical state = transform(state, sym)
+    is the smallest of the symmetric states of state, a solution of it
+    is mapped back with transform_rotates(solution, INVERSE[sym])
+    """
+    packed = bytes(state)
+    best, best_sym = None, 0
+    for sym, gather in enumerate(GATHER):
+        s = bytes(gather(packed)).translate(COLOR_TABLES[sym])
+        if best is None or s < best:
+            best, best_sym = s, sym
+    return tuple(best), best_sym
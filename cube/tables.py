@@ -0,0 +1,110 @@
+"""
+    On disk cache of the solver lookup tables
+
+    Every table (move tables, pruning tables, ...) is built once and saved
+    to a binary file in the cache directory, later processes map the file
+    in memory (mmap) instead of building the table again.
+
+    The cache directory is $RUBIKS_CUBE_CACHE, else ~/.cache/rubiks-cube-solver.
+
+    A file starts with a header (magic, version, typecode, byte order,
+    item count, CRC32 of the data), a table is built again when the file
+    is missing, has another version or fails the integrity checks.
+    Increase VERSION whenever the layout of any table changes.
+"""
+
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from array import array
+
+
+VERSION = 1
+
+MAGIC = b'RCST'
+HEADER = struct.Struct('<4sIcc2xQI4x')
+
+_loaded = {}
+
+
+def cache_dir():
+    """
+    Directory holding the table files
+    """
+    path = os.environ.get('RUBIKS_CUBE_CACHE')
+    if path is None:
+        path = os.path.join(os.path.expanduser('~'), '.cache', 'rubiks-cube-solver')
+    return path
+
+
+def load(name, typecode, build):
+    """
+    Table called name with items of the given typecode (as in array.array),
+    read from the cache or built with build() and saved to the cache
+    """
+    if name in _loaded:
+        return _loaded[name]
+    path = os.path.join(cache_dir(), f'{name}.bin')
+    table = _read(path, typecode)
+    if table is None:
+        table = build()
+        if not isinstance(table, array) or table.typecode != typecode:
+            table = array(typecode, table)
+        _write(path, table)
+        mapped = _read(path, typecode)
+        if mapped is not None:
+            table = mapped
+    _loaded[name] = table
+    return table
+
+
+def _read(path, typecode):
+    """
+    Memory mapped table of the file, None if it is missing or invalid
+    """
+    try:
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    try:
+        magic, version, code, order, count, crc = HEADER.unpack_from(mm)
+    except struct.error:
+        mm.close()
+        return None
+    itemsize = array(typecode).itemsize
+    data = memoryview(mm)[HEADER.size:]
+    if (magic != MAGIC or version != VERSION or code != typecode.encode()
+            or order != sys.byteorder[0].encode() or len(data) != count * itemsize
+            or zlib.crc32(data) != crc):
+        data.release()
+        mm.close()
+        return None
+    return data.cast(typecode)
+
+
+def _write(path, table):
+    """
+    Save the table, the file is replaced at once so other processes
+    never read a partly written table
+    """
+    data = table.tobytes()
+    header = HEADER.pack(MAGIC, VERSION, table.typecode.encode(), sys.byteorder[0].encode(),
+                         len(table), zlib.crc32(data))
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    except OSError:
+        # read only cache directory, the table stays in memory only
+        return
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header)
+            f.write(data)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except OSError:
+        os.unlink(tmp)
@@ -0,0 +1,316 @@
+"""
+    Two Phase (Kociemba) Solver
+
+    Phase 1 brings the cube into the subgroup <F, B, U2, D2, L2, R2>
+    (corners and edges oriented, edges of the middle slice in the slice),
+    Phase 2 solves the cube using only the moves of that subgroup.
+    Both phases are searched with IDA*, using pruning tables that give
+    a lower bound of the moves needed to reach the goal of the phase.
+
+    The solution is a list of moves (0 ... 17, see cube.cubie).
+"""
+
+from time import perf_counter
+
+from . import tables
+from .budget import SolveBudgetExceeded
+from .cubie import (verify, move_table, set_edge_set, rank,
+                    N_MOVE, N_TWIST, N_FLIP, N_SLICE, N_CORNERS, N_UD_EDGES,
+                    PHASE2_MOVES, F_EDGES, B_EDGES)
+
+
+# index of the opposite side in FACES ('FULRDB')
+OPPOSITE = [5, 4, 3, 2, 1, 0]
+
+# longest phase 2 searched for a phase 1 solution
+MAX_PHASE2 = 12
+
+# nodes searched between two checks of the deadline and the stop value
+POLL_NODES = 1024
+
+
+def _bfs(a_move, b_move, n_b, size, moves, start=0):
+    """
+    Pruning table of the coordinate pair (a, b) at index a * n_b + b:
+    distance (in moves) of every index from index start (the solved cube)
+    """
+    table = bytearray(b'\xff') * size
+    table[start] = 0
+    frontier = [start]
+    unvisited = size - 1
+    depth = 0
+    while frontier:
+        depth += 1
+        nxt = []
+        if len(frontier) < unvisited:
+            # forward, from the cubes at the last depth
+            for i in frontier:
+                a, b = divmod(i, n_b)
+                ka, kb = N_MOVE * a, N_MOVE * b
+                for m in moves:
+                    j = a_move[ka + m] * n_b + b_move[kb + m]
+                    if table[j] == 255:
+                        table[j] = depth
+                        nxt.append(j)
+        else:
+            # backward, from the cubes not reached yet (all moves have their inverse)
+            j = table.find(255)
+            while j >= 0:
+                a, b = divmod(j, n_b)
+                ka, kb = N_MOVE * a, N_MOVE * b
+                for m in moves:
+                    if table[a_move[ka + m] * n_b + b_move[kb + m]] == depth - 1:
+                        nxt.append(j)
+                        break
+                j = table.find(255, j + 1)
+            for j in nxt:
+                table[j] = depth
+        unvisited -= len(nxt)
+        frontier = nxt
+    return table
+
+
+def _slice_move():
+    """
+    Move table of the positions of the middle slice edges (0 ... 494)
+    """
+    slice_sorted_move = move_table('slice_sorted_move')
+    return [slice_sorted_move[N_MOVE * 24 * s + m] // 24 for s in range(N_SLICE) for m in range(N_MOVE)]
+
+
+PRUNING_BUILDERS = {'slice_twist_prun': lambda: _bfs(_slice_move(), move_table('twist_move'),
+                                                    N_TWIST, N_SLICE * N_TWIST, range(N_MOVE)),
+                    'slice_flip_prun': lambda: _bfs(_slice_move(), move_table('flip_move'),
+                                                   N_FLIP, N_SLICE * N_FLIP, range(N_MOVE)),
+                    'corners_slice_prun': lambda: _bfs(move_table('corners_move'), move_table('slice_sorted_move'),
+                                                       24, N_CORNERS * 24, PHASE2_MOVES),
+                    'ud_edges_slice_prun': lambda: _bfs(move_table('ud_edges_move'), move_table('slice_sorted_move'),
+                                                        24, N_UD_EDGES * 24, PHASE2_MOVES)}
+
+
+def pruning_table(name):
+    """
+    Pruning table of the two phase search (loaded from the table cache)
+    """
+    return tables.load(name, 'B', PRUNING_BUILDERS[name])
+
+
+class SolveTimeout(SolveBudgetExceeded):
+    """
+    No solution found within the given time
+    """
+
+
+class SearchStopped(Exception):
+    """
+    The search was stopped from outside (see Search.stop)
+    """
+
+
+class TreeSearch:
+    """
+    Base of the tree searches (Search, optimal.OptimalSearch): the nodes
+    searched, the deadline and the stop value of a parallel search
+    """
+    name = 'Tree'
+
+    def __init__(self):
+        # shared value (multiprocessing.Value), the search stops when it is set
+        self.stop = None
+
+    def reset(self, timeout=None, nodes=None):
+        """
+        Start a new search, stopped after timeout seconds or nodes nodes
+        """
+        self.deadline = None if timeout is None else perf_counter() + timeout
+        self.max_nodes = nodes
+        self.nodes = 0
+        self.next_poll = 0
+        self.path = []
+
+    def poll(self):
+        """
+        Raise SolveBudgetExceeded past the nodes, SolveTimeout after the deadline,
+        SearchStopped once stopped, called every POLL_NODES nodes
+        """
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise SolveBudgetExceeded(f'More than {self.max_nodes} nodes searched')
+        if self.deadline is not None and perf_counter() > self.deadline:
+            raise SolveTimeout(f'{self.name} search timed out')
+        if self.stop is not None and self.stop.value:
+            raise SearchStopped()
+        self.next_poll = self.nodes + POLL_NODES
+        if self.max_nodes is not None and self.next_poll > self.max_nodes:
+            self.next_poll = self.max_nodes + 1
+
+
+class Search(TreeSearch):
+    """
+    Two Phase search for one cube
+    """
+    name = 'Two phase'
+
+    def __init__(self):
+        super().__init__()
+        self.twist_move = move_table('twist_move')
+        self.flip_move = move_table('flip_move')
+        self.slice_sorted_move = move_table('slice_sorted_move')
+        self.f_edges_move = move_table('f_edges_move')
+        self.b_edges_move = move_table('b_edges_move')
+        self.corners_move = move_table('corners_move')
+        self.ud_edges_move = move_table('ud_edges_move')
+        self.slice_twist_prun = pruning_table('slice_twist_prun')
+        self.slice_flip_prun = pruning_table('slice_flip_prun')
+        self.corners_slice_prun = pruning_table('corners_slice_prun')
+        self.ud_edges_slice_prun = pruning_table('ud_edges_slice_prun')
+        self.f_positions = {}
+        self.b_positions = {}
+
+    def start(self, cubie, max_length=22, timeout=None, nodes=None):
+        """
+        Set up the search of the cubie cube, returns its phase 1 coordinates
+        (twist, flip, slice_sorted, corners) and their lower bound
+        """
+        self.f_edges = cubie.get_f_edges()
+        self.b_edges = cubie.get_b_edges()
+        self.max_length = max_length
+        self.reset(timeout, nodes)
+        twist, flip, slice_sorted = cubie.get_twist(), cubie.get_flip(), cubie.get_slice_sorted()
+        s = slice_sorted // 24
+        h = max(self.slice_twist_prun[s * N_TWIST + twist], self.slice_flip_prun[s * N_FLIP + flip])
+        return (twist, flip, slice_sorted, cubie.get_corners()), h
+
+    def solve(self, cubie, max_length=22, timeout=None, nodes=None):
+        """
+        Moves solving the cubie cube, with at most max_length moves
+        """
+        (twist, flip, slice_sorted, corners), h = self.start(cubie, max_length, timeout, nodes)
+        for depth in range(h, max_length + 1):
+            if h == 0 and depth == 0:
+                if self.start_phase2(corners, slice_sorted, -1):
+                    return self.path
+            elif self.phase1(twist, flip, slice_sorted, corners, depth, -1):
+                return self.path
+        return None
+
+    def subtree(self, cubie, max_length, m, depth):
+        """
+        Solution whose phase 1 has depth moves and starts with move m, or None
+        (the part of solve() done by one worker of a parallel search)
+        """
+        (twist, flip, slice_sorted, corners), h = self.start(cubie, max_length)
+        tw = self.twist_move[N_MOVE * twist + m]
+        fl = self.flip_move[N_MOVE * flip + m]
+        sl = self.slice_sorted_move[N_MOVE * slice_sorted + m]
+        co = self.corners_move[N_MOVE * corners + m]
+        s = sl // 24
+        h = max(self.slice_twist_prun[s * N_TWIST + tw], self.slice_flip_prun[s * N_FLIP + fl])
+        if h >= depth or h == 0 and depth > 1:
+            return None
+        self.path = [m]
+        if depth == 1:
+            found = self.start_phase2(co, sl, m // 3)
+        else:
+            found = self.phase1(tw, fl, sl, co, depth - 1, m // 3)
+        return self.path if found else None
+
+    def phase1(self, twist, flip, slice_sorted, corners, togo, last):
+        self.nodes += 1
+        if self.nodes >= self.next_poll:
+            self.poll()
+        twist_move, flip_move, slice_sorted_move = self.twist_move, self.flip_move, self.slice_sorted_move
+        slice_twist_prun, slice_flip_prun = self.slice_twist_prun, self.slice_flip_prun
+        path = self.path
+        for m in range(N_MOVE):
+            side = m // 3
+            if last >= 0 and (side == last or side == OPPOSITE[last] and side < last):
+                continue
+            tw = twist_move[N_MOVE * twist + m]
+            fl = flip_move[N_MOVE * flip + m]
+            sl = slice_sorted_move[N_MOVE * slice_sorted + m]
+            s = sl // 24
+            h = slice_twist_prun[s * N_TWIST + tw]
+            h2 = slice_flip_prun[s * N_FLIP + fl]
+            if h2 > h:
+                h = h2
+            if h >= togo or h == 0 and togo > 1:
+                continue
+            co = self.corners_move[N_MOVE * corners + m]
+            path.append(m)
+            if togo == 1:
+                if self.start_phase2(co, sl, side):
+                    return True
+            elif self.phase1(tw, fl, sl, co, togo - 1, side):
+                return True
+            path.pop()
+        return False
+
+    def start_phase2(self, corners, slice_sorted, last):
+        f_edges, b_edges = self.f_edges, self.b_edges
+        for m in self.path:
+            f_edges = self.f_edges_move[N_MOVE * f_edges + m]
+            b_edges = self.b_edges_move[N_MOVE * b_edges + m]
+        ud_edges = self.ud_edges(f_edges, b_edges)
+        h = max(self.corners_slice_prun[corners * 24 + slice_sorted],
+                self.ud_edges_slice_prun[ud_edges * 24 + slice_sorted])
+        limit = min(MAX_PHASE2, self.max_length - len(self.path))
+        for depth in range(h, limit + 1):
+            if self.phase2(corners, ud_edges, slice_sorted, depth, last):
+                return True
+        return False
+
+    def phase2(self, corners, ud_edges, slice_sorted, togo, last):
+        if togo == 0:
+            return corners == 0 and ud_edges == 0 and slice_sorted == 0
+        self.nodes += 1
+        if self.nodes >= self.next_poll:
+            self.poll()
+        corners_move, ud_edges_move, slice_sorted_move = self.corners_move, self.ud_edges_move, self.slice_sorted_move
+        corners_slice_prun, ud_edges_slice_prun = self.corners_slice_prun, self.ud_edges_slice_prun
+        path = self.path
+        for m in PHASE2_MOVES:
+            side = m // 3
+            if last >= 0 and (side == last or side == OPPOSITE[last] and side < last):
+                continue
+            co = corners_move[N_MOVE * corners + m]
+            sl = slice_sorted_move[N_MOVE * slice_sorted + m]
+            if corners_slice_prun[co * 24 + sl] >= togo:
+                continue
+            ud = ud_edges_move[N_MOVE * ud_edges + m]
+            if ud_edges_slice_prun[ud * 24 + sl] >= togo:
+                continue
+            path.append(m)
+            if self.phase2(co, ud, sl, togo - 1, side):
+                return True
+            path.pop()
+        return False
+
+    def ud_edges(self, f_edges, b_edges):
+        """
+        Phase 2 edge coordinate from the positions of the FRONT and BACK edges
+        """
+        ep = [0] * 8
+        for pieces, coord, positions in ((F_EDGES, f_edges, self.f_positions),
+                                         (B_EDGES, b_edges, self.b_positions)):
+            if coord not in positions:
+                placed = set_edge_set(coord, pieces)
+                positions[coord] = [(i, e) for i, e in enumerate(placed) if e in pieces]
+            for i, e in positions[coord]:
+                ep[i] = e
+        return rank(ep)
+
+
+_search = None
+
+
+def solve(state, max_length=22, timeout=None):
+    """
+    Two Phase solution (list of moves 0 ... 17) of a facelet tuple (Cube.state)
+    """
+    global _search
+    if _search is None:
+        _search = Search()
+    moves = _search.solve(verify(state), max_length, timeout)
+    if moves is None:
+        raise ValueError(f'No solution with at most {max_length} moves')
+    return list(moves)
@@ -0,0 +1,132 @@
+"""
+    Batched move engine for many cubes at once (needs numpy)
+
+    N cubes are stored as an (N, 54) uint8 array of facelet colors,
+    row i is the Cube.state of cube i.
+    A move (or a different move for every cube) is applied to the whole
+    batch with a single fancy indexing, using the same permutations as
+    the Cube moves (cube.MOVES).
+
+    Moves are given by name ('F', 'F_', 'F2', ...) or by index in MOVE_NAMES,
+    from_rotates converts a solution (Cube.rotates) to these indexes.
+"""
+
+from weakref import WeakKeyDictionary
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError('cube.vector needs numpy: pip3 install numpy') from None
+
+from . import SOLVED, MOVES, compose
+from .cubie import MOVE_NAMES
+
+
+PERMS = np.array([MOVES[name] for name in MOVE_NAMES], dtype=np.intp)
+SOLVED_ROW = np.array(SOLVED, dtype=np.uint8)
+
+ROTATE_INDEX = {}
+for _i in range(1, 7):
+    ROTATE_INDEX[_i] = 3 * (_i - 1)
+    ROTATE_INDEX[-_i] = 3 * (_i - 1) + 2
+
+
+def move_index(move):
+    """
+    Index in MOVE_NAMES of a move name (or of an index)
+    """
+    if isinstance(move, str):
+        return MOVE_NAMES.index(move)
+    return int(move)
+
+
+def from_rotates(rotates):
+    """
+    Indexes in MOVE_NAMES of the moves of a solution (Cube.rotates)
+    """
+    return [ROTATE_INDEX[r] for r in rotates]
+
+
+def sequence_permutation(moves):
+    """
+    Single permutation of a sequence of moves (names or indexes)
+    """
+    return np.array(compose(*[MOVES[MOVE_NAMES[move_index(m)]] for m in moves]), dtype=np.intp)
+
+
+# index arrays of the compiled sequences (cube.notation) played on batches
+_played = WeakKeyDictionary()
+
+
+class CubeBatch:
+    """
+    Facelets of N cubes in an (N, 54) uint8 array
+    """
+    def __init__(self, states):
+        self.states = np.array(states, dtype=np.uint8).reshape(-1, 54)
+
+    @classmethod
+    def solved(cls, n):
+        return cls(np.tile(SOLVED_ROW, (n, 1)))
+
+    @classmethod
+    def from_cubes(cls, cubes):
+        return cls([c.state for c in cubes])
+
+    def __len__(self):
+        return len(self.states)
+
+    def move(self, move):
+        """
+        Apply the same move to every cube
+        """
+        self.states = self.states[:, PERMS[move_index(move)]]
+
+    def moves(self, moves):
+        """
+        Apply moves[i] (indexes in MOVE_NAMES) to cube i
+        """
+        perms = PERMS[np.asarray(moves, dtype=np.intp)]
+        self.states = np.take_along_axis(self.states, perms, axis=1)
+
+    def apply(self, sequence):
+        """
+        Apply the same sequence of moves to every cube, in one gather
+        """
+        self.states = self.states[:, sequence_permutation(sequence)]
+
+    def play(self, text):
+        """
+        Apply moves in standard notation (see cube.notation) to every cube,
+        in one gather of the compiled sequence
+        """
+        from .notation import compile_moves
+        sequence = compile_moves(text)
+        perm = _played.get(sequence)
+        if perm is None:
+            perm = _played[sequence] = np.array(sequence.perm, dtype=np.intp)
+        self.states = self.states[:, perm]
+
+    def scramble(self, n_moves, rng=None):
+        """
+        Apply n_moves random moves to every cube (different for every cube)
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+        for moves in rng.integers(0, len(MOVE_NAMES), size=(n_moves, len(self.states))):
+            self.moves(moves)
+
+    def is_solved(self):
+        """
+        Boolean array, True for the solved cubes
+        """
+        return (self.states == SOLVED_ROW).all(axis=1)
+
+    def to_cubes(self):
+        from . import Cube
+        cubes = []
+        for row in self.states:
+            cube = Cube()
+            cube.state = tuple(row.tolist())
+            cubes.append(cube)
+        return cubes
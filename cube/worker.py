@@ -0,0 +1,139 @@
+"""
+    Solve cubes in a background process, with progress and cancellation
+
+    The GUI keeps one SolveWorker: its process is started once (under the
+    spawn start method a new process imports the application again, which
+    is too slow for every solve) and solves the cubes sent by solve().
+    The GUI polls it from its own loop (a Kivy Clock event), it never waits
+    for the solver: the worker sends the name of every finished stage, then
+    the solution (or the error). Cancelling terminates the process, even a
+    solver stuck in one of its loops, a new one is started by the next solve.
+"""
+
+from multiprocessing import get_context
+
+from .stats import SolveStats
+
+
+STAGES = {'cfop': ('daisy', 'white_cross', 'white_corners', 'second_layer',
+                   'orient_edges', 'permute_edges', 'permute_corners', 'orient_corners'),
+          'two_phase': ('two_phase',),
+          'optimal': ('optimal',),
+          'optimal_qtm': ('optimal_qtm',)}
+
+
+class _Progress(SolveStats):
+    """
+    SolveStats sending the name of every finished stage of a job to the queue
+    """
+    def __init__(self, queue, job):
+        super().__init__()
+        self.queue = queue
+        self.job = job
+
+    def record(self, name, seconds, moves, iterations):
+        super().record(name, seconds, moves, iterations)
+        self.queue.put((self.job, 'stage', name))
+
+
+def _serve(requests, results):
+    from . import Cube
+    while True:
+        request = requests.get()
+        if request is None:
+            return
+        job, state, method = request
+        try:
+            cube = Cube()
+            cube.state = state
+            results.put((job, 'done', cube.solve(method=method, stats=_Progress(results, job))))
+        except Exception as e:
+            results.put((job, 'error', str(e) or type(e).__name__))
+
+
+class SolveWorker:
+    """
+    A process solving one cube at a time, on a copy of the state
+    """
+    def __init__(self):
+        self.context = get_context()
+        self.process = None
+        self.job = 0
+        self.state = None
+        self.method = None
+        self.stages = []
+        self.solution = None
+        self.error = None
+        self.start()
+
+    def start(self):
+        self.requests = self.context.SimpleQueue()
+        self.results = self.context.SimpleQueue()
+        self.process = self.context.Process(target=_serve, args=(self.requests, self.results), daemon=True)
+        self.process.start()
+
+    def solve(self, state, method='cfop'):
+        """
+        Start solving a state, the worker must be done with the previous one
+        """
+        if self.running:
+            raise RuntimeError('The worker is still solving')
+        if not self.process.is_alive():
+            self.start()
+        self.job += 1
+        self.state = tuple(state)
+        self.method = method
+        self.stages = []
+        self.solution = None
+        self.error = None
+        self.requests.put((self.job, self.state, method))
+
+    @property
+    def done(self):
+        return self.solution is not None or self.error is not None
+
+    @property
+    def running(self):
+        return self.state is not None and not self.done
+
+    @property
+    def progress(self):
+        """
+        Fraction of the stages finished, from 0 to 1
+        """
+        if self.solution is not None:
+            return 1.0
+        return min(1.0, len(self.stages) / len(STAGES.get(self.method, self.stages or (None,))))
+
+    def poll(self):
+        """
+        Read the messages of the worker without waiting, True once it is done
+        """
+        while not self.done and not self.results.empty():
+            job, kind, value = self.results.get()
+            if job != self.job:
+                continue
+            if kind == 'stage':
+                self.stages.append(value)
+            elif kind == 'done':
+                self.solution = value
+            else:
+                self.error = value
+        if not self.done and not self.process.is_alive() and self.results.empty():
+            self.error = f'Solver exited with code {self.process.exitcode}'
+        return self.done
+
+    def cancel(self):
+        """
+        Stop the running solve (the process is terminated)
+        """
+        if not self.running:
+            return
+        self.process.terminate()
+        self.process.join()
+        self.error = 'Cancelled'
+
+    def close(self):
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
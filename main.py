@@ -7,20 +7,142 @@ from kivymd.app import MDApp
 from kivymd.toast.kivytoast.kivytoast import toast
 
 from kivy.uix.button import Button
+from kivy.uix.label import Label
+from kivy.uix.slider import Slider
 from kivy.uix.screenmanager import ScreenManager, Screen, FadeTransition
 from kivy.base import EventLoop
 from kivy.graphics import Color, Rectangle
+from kivy.clock import Clock
 
 from functools import partial
-from copy import deepcopy as copy
+from operator import itemgetter
 from time import sleep
 from threading import Thread
-from cube import Cube
+from cube import Cube, SolveCache, InvalidCube, verify, FACES, MOVES
+from cube.worker import SolveWorker
 
 
 INPUT_CUBE = []
 INPUT = [False, False]
 
+COLORS = {0: (1, 1, 1, 1),
+          1: (0, 1, 0, 1),
+          2: (1, 0, 0, 1),
+          3: (1, 165 / 255, 0, 1),
+          4: (0, 0, 1, 1),
+          5: (1, 1, 0, 1)}
+
+
+def sticker_facelets():
+    """
+    Index in Cube.state of the facelet shown by every sticker button:
+    U on top, the L F R B row, D at the bottom, the back face turned
+    half a turn (as after B2) to line up with the row
+    """
+    def facelet(side, i, j):
+        k = 9 * FACES.index(side) + 3 * i + j
+        return MOVES['B2'][k] if side == 'B' else k
+    facelets = [facelet('U', i, j) for i in range(3) for j in range(3)]
+    facelets += [facelet(side, i, j) for i in range(3) for side in 'LFRB' for j in range(3)]
+    facelets += [facelet('D', i, j) for i in range(3) for j in range(3)]
+    return facelets
+
+
+STICKERS = itemgetter(*sticker_facelets())
+
+# Cube.turn() name of every Cube.rotates value
+MOVE = {1: 'F', -1: 'F_',
+        2: 'U', -2: 'U_',
+        3: 'L', -3: 'L_',
+        4: 'R', -4: 'R_',
+        5: 'D', -5: 'D_',
+        6: 'B', -6: 'B_'}
+
+
+class Playback:
+    """
+        Plays a solution on the cube from the Kivy Clock, on the UI thread
+
+        The moves are played at speed moves per second: every frame applies
+        the moves due since the last frame (several when the moves outpace
+        the frame rate) and draws once, so a solution always takes
+        len(rotations) / speed seconds.
+    """
+    MAX_FRAME = 0.1  # longest frame played in full, after a stall
+
+    def __init__(self, cube, rotations, draw, speed=1 / 0.0075, on_end=None):
+        self.cube = cube
+        self.rotations = list(rotations)
+        self.draw = draw
+        self.speed = speed
+        self.on_end = on_end
+        self.position = 0
+        self.due = 0.0
+        self.event = None
+
+    @property
+    def playing(self):
+        return self.event is not None
+
+    @property
+    def finished(self):
+        return self.position == len(self.rotations)
+
+    def play(self):
+        if self.finished or self.playing:
+            return
+        self.due = 0.0
+        self.event = Clock.schedule_interval(self.tick, 0)
+
+    def pause(self):
+        if self.event is not None:
+            self.event.cancel()
+            self.event = None
+
+    def toggle(self):
+        if self.playing:
+            self.pause()
+        else:
+            self.play()
+
+    def tick(self, dt):
+        self.due += min(dt, self.MAX_FRAME) * self.speed
+        n = min(int(self.due), len(self.rotations) - self.position)
+        self.due -= n
+        self.forward(n)
+        if self.finished:
+            self.event = None
+            if self.on_end is not None:
+                self.on_end()
+            return False
+        self.draw()
+
+    def forward(self, n):
+        for r in self.rotations[self.position:self.position + n]:
+            self.cube.turn(MOVE[r])
+        self.position += n
+
+    def backward(self, n):
+        n = min(n, self.position)
+        for r in reversed(self.rotations[self.position - n:self.position]):
+            self.cube.turn(MOVE[-r])
+        self.position -= n
+
+    def step(self, n=1):
+        """
+        Pause and play n moves (backwards when n < 0)
+        """
+        self.pause()
+        self.seek(self.position + n)
+
+    def seek(self, position):
+        position = max(0, min(len(self.rotations), int(position)))
+        if position > self.position:
+            self.forward(position - self.position)
+        else:
+            self.backward(self.position - position)
+        self.draw()
+
 
 class MainWindow(Screen):
     def __init__(self, **kwargs):
@@ -45,6 +167,11 @@ class MainWindow(Screen):
                           )
 
         self.cube = Cube()
+        self.cache = SolveCache()
+        # one solver process for the whole session
+        self.worker = SolveWorker()
+        self.playback = None
+        self.shown = [None] * 54
 
         with self.canvas.before:
             Color(.3, .3, .3, 1)
@@ -57,14 +184,9 @@ class MainWindow(Screen):
         self.input_btn = get_btn("Input")
         self.solve_btn = get_btn("Solve")
         self.random_btn = get_btn("Random Cube")
-
-        for i in range(9):
-            self.ids[i].background_color = (0, 1, 0, 1)
-            self.ids[45 + i].background_color = (0, 0, 1, 1)
-
-        colors = [(1,0,0,1), (1,1,1,1), (1,165/255,0,1), (1,1,0,1)]
-        for i in range(36):
-            self.ids[9 + i].background_color = colors[(i % 12) // 3]
+        self.progress = Label(text="", font_size=24, size_hint=(None, None))
+        self.controls = [get_btn(text) for text in ("<", "||", ">", "-", "+")]
+        self.seek_bar = Slider(min=0, max=1, value=0, step=1, size_hint=(None, None))
 
         self.reset_btn.bind(on_release=self.reset)
         self.input_btn.bind(on_release=self.change_screen)
@@ -74,48 +196,43 @@ class MainWindow(Screen):
         self.add_widget(self.input_btn)
         self.add_widget(self.solve_btn)
         self.add_widget(self.random_btn)
+        self.add_widget(self.progress)
+        actions = [partial(self.step, -1), self.toggle_playback, partial(self.step, 1),
+                   partial(self.change_speed, 0.5), partial(self.change_speed, 2)]
+        for btn, action in zip(self.controls, actions):
+            btn.bind(on_release=action)
+            self.add_widget(btn)
+        self.seek_bar.bind(value=self.seek)
+        self.add_widget(self.seek_bar)
         self.update_cube()
 
         self.bind(pos=self.update, size=self.update)
 
     def update_cube(self):
-        l = copy(self.cube.cube['L'])
-        f = copy(self.cube.cube['F'])
-        u = copy(self.cube.cube['U'])
-        d = copy(self.cube.cube['D'])
-        r = copy(self.cube.cube['R'])
-
-        self.cube.B()
-        self.cube.B()
-        b = copy(self.cube.cube['B'])
-        self.cube.B_()
-        self.cube.B_()
-
-        colors = {2: (1, 0, 0, 1),
-                  4: (0, 0, 1, 1),
-                  0: (1, 1, 1, 1),
-                  1: (0, 1, 0, 1),
-                  3: (1, 165 / 255, 0, 1),
-                  5: (1, 1, 0, 1)}
-
-        for i in range(3):
-            for j in range(3):
-                self.ids[j + (i * 3)].background_color = colors[u[i][j]]
-                self.ids[9 + j + (i * 12)].background_color = colors[l[i][j]]
-                self.ids[12 + j + (i * 12)].background_color = colors[f[i][j]]
-                self.ids[15 + j + (i * 12)].background_color = colors[r[i][j]]
-                self.ids[18 + j + (i * 12)].background_color = colors[b[i][j]]
-                self.ids[45 + j + (i * 3)].background_color = colors[d[i][j]]
+        # repaint only the stickers whose color changed since the last call
+        shown = self.shown
+        for i, color in enumerate(STICKERS(self.cube.state)):
+            if shown[i] != color:
+                shown[i] = color
+                self.ids[i].background_color = COLORS[color]
 
     def rotate(self, side, *args):
+        # a solution found for the cube before the turn would not solve it
+        self.cancel()
+        # nor would the rest of a solution being played
+        self.stop_playback()
         self.cube.rotate(side)
         self.update_cube()
 
     def random(self, *args):
+        self.cancel()
+        self.stop_playback()
         self.cube.generate_random_cube()
         self.update_cube()
 
     def reset(self, *args):
+        self.cancel()
+        self.stop_playback()
         self.cube.reset()
         self.update_cube()
 
@@ -130,11 +247,14 @@ class MainWindow(Screen):
         while not INPUT[0]:
             sleep(0.01)
         if INPUT[1]:
-            for i, j in enumerate("FULRDB"):
-                self.cube.cube[j] = INPUT_CUBE[i]
+            self.cube.cube = {j: INPUT_CUBE[i] for i, j in enumerate("FULRDB")}
             self.update_cube()
 
     def solve(self, *args):
+        if self.worker.running:
+            self.cancel()
+            return
+        self.stop_playback()
         if self.cube.cube == {'F': [[0, 0, 0], [0, 0, 0], [0, 0, 0]],
                               'U': [[1, 1, 1], [1, 1, 1], [1, 1, 1]],
                               'L': [[2, 2, 2], [2, 2, 2], [2, 2, 2]],
@@ -142,24 +262,78 @@ class MainWindow(Screen):
                               'D': [[4, 4, 4], [4, 4, 4], [4, 4, 4]],
                               'B': [[5, 5, 5], [5, 5, 5], [5, 5, 5]]}:
             return
-        scrambled = copy(self.cube.cube)
-        rotations = copy(self.cube.solve())
-        self.cube.cube = scrambled
-
-        Thread(target=self.solve_thread, args=(rotations,)).start()
-
-    def solve_thread(self, rotations):
-        direction = {1: 'F', -1: 'F_',
-                     2: 'U', -2: 'U_',
-                     3: 'L', -3: 'L_',
-                     4: 'R', -4: 'R_',
-                     5: 'D', -5: 'D_',
-                     6: 'B', -6: 'B_'}
-        t = 0.0075
-        for i in rotations:
-            self.cube.rotate(direction[i])
-            self.update_cube()
-            sleep(t)
+        rotations = self.cache.lookup(self.cube.state)
+        if rotations is not None:
+            self.start_playback(rotations)
+            return
+
+        # the solver runs in another process, the window keeps drawing
+        self.worker.solve(self.cube.state)
+        self.solve_btn.text = "Cancel"
+        self.progress.text = "Solving..."
+        Clock.schedule_interval(self.poll_solve, 1 / 30)
+
+    def poll_solve(self, dt):
+        worker = self.worker
+        if not worker.running:
+            # cancelled
+            return False
+        if not worker.poll():
+            self.progress.text = f"Solving... {worker.progress:.0%}"
+            return True
+        self.solve_btn.text = "Solve"
+        if worker.error is not None:
+            self.progress.text = ""
+            toast(worker.error, background=[0,0,0,1])
+            return False
+        self.progress.text = f"{len(worker.solution)} moves"
+        self.cache.store(worker.state, 'cfop', worker.solution)
+        self.start_playback(worker.solution)
+        return False
+
+    def cancel(self, *args):
+        if not self.worker.running:
+            return
+        self.worker.cancel()
+        self.solve_btn.text = "Solve"
+        self.progress.text = ""
+
+    def start_playback(self, rotations):
+        self.playback = Playback(self.cube, rotations, self.draw_playback, on_end=self.draw_playback)
+        self.seek_bar.max = max(1, len(rotations))
+        self.playback.play()
+        self.draw_playback()
+
+    def stop_playback(self):
+        if self.playback is not None:
+            self.playback.pause()
+            self.playback = None
+            self.seek_bar.value = 0
+            self.controls[1].text = "||"
+
+    def draw_playback(self):
+        self.update_cube()
+        self.seek_bar.value = self.playback.position
+        self.controls[1].text = "||" if self.playback.playing else ">>"
+
+    def toggle_playback(self, *args):
+        if self.playback is not None:
+            self.playback.toggle()
+            self.draw_playback()
+
+    def step(self, n, *args):
+        if self.playback is not None:
+            self.playback.step(n)
+
+    def seek(self, slider, value):
+        # the slider follows the playback, only a move of the user seeks
+        if self.playback is not None and int(value) != self.playback.position:
+            self.playback.pause()
+            self.playback.seek(value)
+
+    def change_speed(self, factor, *args):
+        if self.playback is not None:
+            self.playback.speed = min(2000, max(1, self.playback.speed * factor))
 
     def update(self, *args):
         self.solve_btn.size = (250, 60)
@@ -170,6 +344,14 @@ class MainWindow(Screen):
         self.input_btn.pos = (950, 120)
         self.reset_btn.size = (250, 60)
         self.reset_btn.pos = (950, 40)
+        self.progress.size = (250, 60)
+        self.progress.pos = (950, 360)
+        for i, btn in enumerate(self.controls):
+            btn.font_size = 24
+            btn.size = (46, 46)
+            btn.pos = (950 + 51 * i, 440)
+        self.seek_bar.size = (250, 40)
+        self.seek_bar.pos = (950, 500)
 
         b = 65
         s1 = 30 + b*3 + 12
@@ -391,6 +573,12 @@ class InputWindow(Screen):
                 for c in b:
                     self.original_cube[i][j].append(data[c])
 
+        try:
+            verify(Cube.to_state({j: self.original_cube[i] for i, j in enumerate("FULRDB")}))
+        except InvalidCube as e:
+            toast(f"Enter a Valid Cube: {e}", background=[0,0,0,1])
+            return True
+
         global INPUT_CUBE, INPUT
         INPUT_CUBE = self.original_cube
         INPUT = [True, True]
@@ -463,6 +651,9 @@ class MyApp(MDApp):
         sm.add_widget(InputWindow(name='input'))
         return sm
 
+    def on_stop(self):
+        self.root.get_screen('main').worker.close()
+
 
 if __name__ == '__main__':
     MyApp().run()
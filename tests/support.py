@@ -0,0 +1,24 @@
+"""
+    Helpers of the tests
+
+    Run the tests with python -m unittest discover tests (or pytest).
+    The search methods read their tables from the table cache
+    (RUBIKS_CUBE_CACHE), the first run builds them there.
+"""
+
+from cube import FACES, MOVES, Cube
+
+
+def replay(state, rotates):
+    """
+    State after the moves of Cube.rotates (1 ... 6 for F U L R D B, negative counterclockwise)
+    """
+    for r in rotates:
+        state = tuple(state[i] for i in MOVES[FACES[abs(r) - 1] + ('' if r > 0 else '_')])
+    return state
+
+
+def random_cube(seed):
+    cube = Cube()
+    cube.generate_random_cube(seed)
+    return cube
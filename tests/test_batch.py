@@ -0,0 +1,33 @@
+import unittest
+
+from cube import SOLVED, InvalidCube, isolve_many, solve_many
+from support import random_cube, replay
+
+
+class BatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.states = [random_cube(seed).state for seed in range(12)]
+
+    def test_order(self):
+        solutions = solve_many(self.states, workers=2, chunksize=2)
+        self.assertEqual(len(solutions), len(self.states))
+        for state, solution in zip(self.states, solutions):
+            self.assertEqual(replay(state, solution), SOLVED)
+        ordered = list(isolve_many(self.states, workers=2, chunksize=2, ordered=True))
+        self.assertEqual([i for i, _ in ordered], list(range(len(self.states))))
+        self.assertEqual([list(s) for _, s in ordered], [list(s) for s in solutions])
+        unordered = sorted(isolve_many(self.states, workers=2, chunksize=1, window=4))
+        self.assertEqual(unordered, ordered)
+        self.assertEqual(solve_many(self.states, workers=1), solutions)
+
+    def test_errors(self):
+        states = [self.states[0], SOLVED[::-1], self.states[1]]
+        self.assertRaises(InvalidCube, solve_many, states, workers=1)
+        results = list(isolve_many(states, workers=1, ordered=True, errors=True))
+        self.assertIsInstance(results[1][1], InvalidCube)
+        self.assertEqual(replay(states[2], results[2][1]), SOLVED)
+
+
+if __name__ == '__main__':
+    unittest.main()
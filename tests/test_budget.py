@@ -0,0 +1,47 @@
+import unittest
+
+from cube import SOLVED, Cube, SolveBudget, SolveBudgetExceeded
+from cube.budget import OPTIMAL_TIMEOUT
+from support import random_cube
+
+
+class SolveBudgetTest(unittest.TestCase):
+
+    def test_iterations(self):
+        for method in ('cfop', 'two_phase'):
+            cube = random_cube(1)
+            with self.assertRaisesRegex(SolveBudgetExceeded, 'More than 1 '):
+                cube.solve(method, budget=SolveBudget(iterations=1))
+
+    def test_moves(self):
+        for method in ('cfop', 'two_phase'):
+            cube = random_cube(1)
+            with self.assertRaisesRegex(SolveBudgetExceeded, 'More than 5 moves'):
+                cube.solve(method, budget=SolveBudget(moves=5))
+
+    def test_seconds(self):
+        cube = random_cube(1)
+        self.assertRaises(SolveBudgetExceeded, cube.solve, 'optimal', budget=SolveBudget(seconds=0.1))
+
+    def test_no_limit(self):
+        cube = random_cube(1)
+        cube.solve('two_phase', budget=SolveBudget(iterations=None, moves=None))
+        self.assertEqual(cube.state, SOLVED)
+        # the nodes searched are counted as iterations
+        self.assertGreater(cube.iterations, 0)
+
+    def test_defaults(self):
+        cube = Cube()
+        for method, seconds in (('cfop', None), ('two_phase', None), ('optimal', OPTIMAL_TIMEOUT),
+                                ('optimal_qtm', OPTIMAL_TIMEOUT)):
+            budget = SolveBudget()
+            budget.start(cube, method)
+            self.assertEqual(budget.limits[2], seconds, method)
+            self.assertEqual(budget.remaining() is None, seconds is None, method)
+        budget = SolveBudget(seconds=None)
+        budget.start(cube, 'optimal')
+        self.assertIsNone(budget.remaining())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+
+from cube import SOLVED, Cube, SolveBudget, SolveBudgetExceeded, SolveCache
+from cube.symmetry import transform
+from support import random_cube, replay
+
+
+class SolveCacheTest(unittest.TestCase):
+
+    def test_hit(self):
+        cache = SolveCache()
+        cube = random_cube(1)
+        state = cube.state
+        solution = list(cube.solve(cache=cache))
+        self.assertEqual(cache.info()['misses'], 1)
+        again = Cube()
+        again.state = state
+        self.assertEqual(again.solve(cache=cache), solution)
+        self.assertEqual(again.state, SOLVED)
+        self.assertEqual((cache.hits, cache.misses, len(cache)), (1, 1, 1))
+        # another method is another entry
+        self.assertIsNone(cache.lookup(state, 'two_phase'))
+
+    def test_lru(self):
+        cache = SolveCache(maxsize=2)
+        states = [random_cube(seed).state for seed in range(3)]
+        cache.store(states[0], 'cfop', [1])
+        cache.store(states[1], 'cfop', [2])
+        self.assertEqual(cache.lookup(states[0]), (1,))
+        # the least recently used one is evicted
+        cache.store(states[2], 'cfop', [3])
+        self.assertIsNone(cache.lookup(states[1]))
+        self.assertEqual(cache.lookup(states[0]), (1,))
+        self.assertEqual(cache.lookup(states[2]), (3,))
+        self.assertEqual(cache.info(), {'hits': 3, 'misses': 1, 'evictions': 1, 'size': 2, 'maxsize': 2})
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def test_symmetric(self):
+        cache = SolveCache(symmetric=True)
+        cube = random_cube(2)
+        state = cube.state
+        cube.solve(cache=cache)
+        for sym in range(48):
+            solution = cache.lookup(transform(state, sym))
+            self.assertIsNotNone(solution, sym)
+            self.assertEqual(replay(transform(state, sym), solution), SOLVED, sym)
+        self.assertEqual((cache.hits, len(cache)), (48, 1))
+
+    def test_failed(self):
+        # a solve stopped by its budget is not cached, the moves made are kept
+        cache = SolveCache()
+        cube = random_cube(3)
+        cube.rotates = [1]
+        self.assertRaises(SolveBudgetExceeded, cube.solve, cache=cache, budget=SolveBudget(moves=5))
+        self.assertEqual(cube.rotates[0], 1)
+        self.assertGreater(len(cube.rotates), 1)
+        self.assertEqual(len(cache), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,26 @@
+import unittest
+
+from cube import SOLVED
+from cube.f2l import BUILDERS, CORNER_SLOTS, EDGE_SLOTS, _build, insert_table
+from support import random_cube, replay
+
+
+class F2LTest(unittest.TestCase):
+
+    def test_solve(self):
+        for seed in range(20):
+            cube = random_cube(seed)
+            state = cube.state
+            solution = cube.solve()
+            self.assertEqual(cube.state, SOLVED)
+            self.assertEqual(replay(state, solution), SOLVED)
+
+    def test_tables(self):
+        # the tables of the cache are the same as new ones
+        for slots in (CORNER_SLOTS, EDGE_SLOTS):
+            name, base = BUILDERS[slots]
+            self.assertEqual(insert_table(slots).tolist(), _build(slots, base).tolist(), name)
+
+
+if __name__ == '__main__':
+    unittest.main()
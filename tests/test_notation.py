@@ -0,0 +1,94 @@
+import random
+import unittest
+
+from cube import FACES, MOVES, SOLVED, Cube, compose, inverse
+from cube.notation import EXPANSIONS, ROTATIONS, compile_moves, parse
+from cube.symmetry import DETERMINANTS, INDEX, MATRICES, PERMS, POSITIONS, apply_matrix
+
+
+def layer_perm(sym, inside):
+    """
+    Permutation turning the facelets of the cubies inside a layer with the rotation sym
+    """
+    matrix = MATRICES[sym]
+    perm = list(range(54))
+    for i, (position, normal) in enumerate(POSITIONS):
+        if inside(position):
+            perm[INDEX[apply_matrix(matrix, position), apply_matrix(matrix, normal)]] = i
+    return tuple(perm)
+
+
+X, Y, Z = ROTATIONS['x'], ROTATIONS['y'], ROTATIONS['z']
+
+# the moves as turns of the layers of a physical cube, centers included
+LAYERS = {'M': inverse(layer_perm(X, lambda p: p[0] == 0)),
+          'E': inverse(layer_perm(Y, lambda p: p[1] == 0)),
+          'S': layer_perm(Z, lambda p: p[2] == 0),
+          'Rw': layer_perm(X, lambda p: p[0] >= 0), 'Lw': inverse(layer_perm(X, lambda p: p[0] <= 0)),
+          'Uw': layer_perm(Y, lambda p: p[1] >= 0), 'Dw': inverse(layer_perm(Y, lambda p: p[1] <= 0)),
+          'Fw': layer_perm(Z, lambda p: p[2] >= 0), 'Bw': inverse(layer_perm(Z, lambda p: p[2] <= 0)),
+          'x': PERMS[X], 'y': PERMS[Y], 'z': PERMS[Z],
+          **{side: MOVES[side] for side in FACES}}
+
+
+class NotationTest(unittest.TestCase):
+
+    def test_faces(self):
+        self.assertEqual(layer_perm(X, lambda p: p[0] == 1), MOVES['R'])
+        self.assertEqual(layer_perm(Y, lambda p: p[1] == 1), MOVES['U'])
+        self.assertEqual(layer_perm(Z, lambda p: p[2] == 1), MOVES['F'])
+
+    def test_expansions(self):
+        for name, perm in LAYERS.items():
+            turns, rotations = EXPANSIONS[name]
+            perms = [MOVES[side + {1: '', 2: '2', 3: '_'}[d % 4]] for side, d in turns]
+            perms += [LAYERS[axis] for axis, d in rotations for _ in range(d % 4)]
+            self.assertEqual(compose(*perms), perm, name)
+
+    def test_simulation(self):
+        # a played sequence leaves the cube as a physical one, up to a rotation of the whole cube
+        rotations = [PERMS[s] for s in range(48) if DETERMINANTS[s] == 1]
+        rng = random.Random(1)
+        for _ in range(500):
+            moves = [(rng.choice(list(LAYERS)), rng.choice(('', "'", '2')))
+                     for _ in range(rng.randint(0, 12))]
+            state = SOLVED
+            for name, amount in moves:
+                for _ in range({'': 1, "'": 3, '2': 2}[amount]):
+                    state = tuple(state[i] for i in LAYERS[name])
+            text = ' '.join(name + amount for name, amount in moves)
+            cube = Cube()
+            cube.play(text)
+            self.assertTrue(any(tuple(cube.state[i] for i in p) == state for p in rotations), text)
+
+    def test_play(self):
+        cube = Cube()
+        cube.play("R U R' U'")
+        turned = Cube()
+        for side in ('R', 'U', 'R_', 'U_'):
+            turned.rotate(side)
+        self.assertEqual(cube.state, turned.state)
+        self.assertEqual(cube.rotates, turned.rotates)
+        self.assertIs(compile_moves('R U'), compile_moves('R U'))
+
+    def test_errors(self):
+        for text in ('R Q', 'Rw3', 'w'):
+            self.assertRaises(ValueError, parse, text)
+
+    def test_batch(self):
+        try:
+            import numpy as np
+            from cube.vector import CubeBatch
+        except ImportError:
+            self.skipTest('needs numpy')
+        batch = CubeBatch.solved(4)
+        batch.scramble(10, np.random.default_rng(1))
+        cubes = batch.to_cubes()
+        batch.play("Rw U2 x' M")
+        for cube in cubes:
+            cube.play("Rw U2 x' M")
+        self.assertEqual([tuple(row.tolist()) for row in batch.states], [c.state for c in cubes])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import random
+import unittest
+from array import array
+from operator import itemgetter
+
+from cube import FACES, MOVES, SOLVED
+from cube.cubie import MOVE_NAMES
+from cube.optimal import PRUNING_BUILDERS, optimal_table, solve
+from support import replay
+
+
+def distances(names, depth):
+    """
+    Distance from solved of every state at most depth moves away, by brute force
+    """
+    gathers = [itemgetter(*MOVES[m]) for m in names]
+    found = {SOLVED: 0}
+    layer = [SOLVED]
+    for d in range(1, depth + 1):
+        following = []
+        for state in layer:
+            for gather in gathers:
+                s = gather(state)
+                if s not in found:
+                    found[s] = d
+                    following.append(s)
+        layer = following
+    return found
+
+
+class OptimalTest(unittest.TestCase):
+
+    def check(self, metric, names, depth, cost):
+        found = distances(names, depth)
+        rng = random.Random(1)
+        for state in rng.sample(sorted(found), 100):
+            moves = [MOVE_NAMES[m] for m in solve(state, metric)]
+            self.assertEqual(sum(map(cost, moves)), found[state])
+            rotates = [(FACES.index(m[0]) + 1) * (-1 if m.endswith('_') else 1)
+                       for m in moves for _ in range(2 if m.endswith('2') else 1)]
+            self.assertEqual(replay(state, rotates), SOLVED)
+
+    def test_htm(self):
+        self.check('htm', [f + t for f in FACES for t in ('', '_', '2')], 4, lambda m: 1)
+
+    def test_qtm(self):
+        self.check('qtm', [f + t for f in FACES for t in ('', '_')], 5,
+                   lambda m: 2 if m.endswith('2') else 1)
+
+    def test_tables(self):
+        # the tables of the cache are the same as new ones
+        for name in ('corners_htm_prun', 'f_edges_qtm_prun'):
+            self.assertEqual(optimal_table(name).tolist(), array('B', PRUNING_BUILDERS[name]()).tolist(), name)
+
+
+if __name__ == '__main__':
+    unittest.main()
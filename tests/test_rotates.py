@@ -0,0 +1,47 @@
+import random
+import unittest
+
+from cube import SOLVED, optimize_rotates
+from support import random_cube, replay
+
+
+class OptimizeRotatesTest(unittest.TestCase):
+
+    def sequences(self):
+        rng = random.Random(1)
+        for _ in range(500):
+            # few sides, so that many turns cancel or merge
+            sides = rng.sample(range(1, 7), rng.randint(1, 6))
+            yield [rng.choice(sides) * rng.choice((1, -1)) for _ in range(rng.randint(0, 30))]
+
+    def test_equivalent(self):
+        state = random_cube(1).state
+        for rotates in self.sequences():
+            optimized = optimize_rotates(rotates)
+            self.assertEqual(replay(state, optimized), replay(state, rotates), rotates)
+            self.assertLessEqual(len(optimized), len(rotates))
+
+    def test_fixpoint(self):
+        for rotates in self.sequences():
+            optimized = optimize_rotates(rotates)
+            self.assertEqual(optimize_rotates(optimized), optimized, rotates)
+
+    def test_inverse(self):
+        for rotates in self.sequences():
+            self.assertEqual(optimize_rotates(rotates + [-r for r in reversed(rotates)]), [], rotates)
+
+    def test_examples(self):
+        self.assertEqual(optimize_rotates([1, 1, 1]), [-1])
+        self.assertEqual(optimize_rotates([1, 6, -1]), [6])
+        self.assertEqual(optimize_rotates([2, 3, -3, -2]), [])
+        self.assertEqual(optimize_rotates([4, 4, 4, 4, 5]), [5])
+
+    def test_solution(self):
+        cube = random_cube(2)
+        state = cube.state
+        cube.solve()
+        self.assertEqual(replay(state, optimize_rotates(cube.rotates)), SOLVED)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+
+from cube import SOLVED
+from cube.symmetry import INVERSE, canonical, transform, transform_rotates
+from support import random_cube, replay
+
+
+class SymmetryTest(unittest.TestCase):
+
+    def test_round_trips(self):
+        cube = random_cube(1)
+        state = cube.state
+        solution = cube.solve()
+        for sym in range(48):
+            symmetric = transform(state, sym)
+            self.assertEqual(transform(symmetric, INVERSE[sym]), state)
+            self.assertEqual(replay(symmetric, transform_rotates(solution, sym)), SOLVED)
+
+    def test_canonical(self):
+        state = random_cube(2).state
+        best, sym = canonical(state)
+        self.assertEqual(transform(state, sym), best)
+        for s in range(48):
+            self.assertEqual(canonical(transform(state, s))[0], best)
+
+    def test_solved(self):
+        for sym in range(48):
+            self.assertEqual(transform(SOLVED, sym), SOLVED)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+from array import array
+from unittest import mock
+
+from cube import tables
+from cube.cubie import TABLE_BUILDERS, move_table
+
+
+class CachedTablesTest(unittest.TestCase):
+
+    def test_rebuilt(self):
+        # the tables of the cache are the same as new ones
+        for name in ('twist_move', 'flip_move', 'slice_sorted_move'):
+            self.assertEqual(move_table(name).tolist(), array('H', TABLE_BUILDERS[name]()).tolist(), name)
+
+
+class TablesTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = directory.name
+        patch = mock.patch.dict(os.environ, {'RUBIKS_CUBE_CACHE': self.path})
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.built = array('H', range(1000))
+
+    def load(self, build):
+        tables._loaded.pop('test_table', None)
+        table = tables.load('test_table', 'H', build)
+        del tables._loaded['test_table']
+        return table.tolist()
+
+    def test_file(self):
+        self.assertEqual(self.load(lambda: self.built), self.built.tolist())
+        self.assertTrue(os.path.exists(os.path.join(self.path, 'test_table.bin')))
+        # read back from the file, not built again
+        self.assertEqual(self.load(lambda: self.fail('built again')), self.built.tolist())
+
+    def test_damaged(self):
+        self.load(lambda: self.built)
+        with open(os.path.join(self.path, 'test_table.bin'), 'r+b') as f:
+            f.seek(-1, os.SEEK_END)
+            f.write(b'\xff')
+        rebuilt = []
+        self.assertEqual(self.load(lambda: rebuilt.append(1) or self.built), self.built.tolist())
+        self.assertEqual(rebuilt, [1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,24 @@
+import unittest
+
+from cube import SOLVED, Cube
+from support import random_cube, replay
+
+
+class TwoPhaseTest(unittest.TestCase):
+
+    def test_solve(self):
+        for seed in range(3):
+            cube = random_cube(seed)
+            state = cube.state
+            solution = cube.solve('two_phase')
+            self.assertEqual(cube.state, SOLVED)
+            self.assertEqual(replay(state, solution), SOLVED)
+            # at most 22 moves, a half turn is two entries of Cube.rotates
+            self.assertLessEqual(len(solution), 44)
+
+    def test_solved(self):
+        self.assertEqual(Cube().solve('two_phase'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
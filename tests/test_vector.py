@@ -0,0 +1,49 @@
+import random
+import unittest
+
+from cube import MOVES, SOLVED
+from cube.cubie import MOVE_NAMES
+
+try:
+    import numpy as np
+    from cube.vector import CubeBatch, from_rotates
+except ImportError:
+    np = None
+
+
+@unittest.skipIf(np is None, 'needs numpy')
+class CubeBatchTest(unittest.TestCase):
+
+    def test_moves(self):
+        batch = CubeBatch.solved(8)
+        batch.scramble(20, np.random.default_rng(1))
+        cubes = batch.to_cubes()
+        rng = random.Random(1)
+        for _ in range(10):
+            moves = [rng.randrange(len(MOVE_NAMES)) for _ in cubes]
+            batch.moves(moves)
+            for cube, m in zip(cubes, moves):
+                cube.rotate(MOVE_NAMES[m])
+        self.assertEqual([tuple(row.tolist()) for row in batch.states], [c.state for c in cubes])
+
+    def test_apply(self):
+        batch = CubeBatch.solved(2)
+        batch.move('R')
+        batch.apply(['U', 'R_', 'F2'])
+        state = SOLVED
+        for m in ('R', 'U', 'R_', 'F2'):
+            state = tuple(state[i] for i in MOVES[m])
+        self.assertEqual([tuple(row.tolist()) for row in batch.states], [state] * 2)
+
+    def test_solutions(self):
+        batch = CubeBatch.solved(4)
+        batch.scramble(25, np.random.default_rng(2))
+        self.assertFalse(batch.is_solved().any())
+        for cube in batch.to_cubes():
+            one = CubeBatch.from_cubes([cube])
+            one.apply(from_rotates(cube.solve()))
+            self.assertTrue(one.is_solved().all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+
+from cube import CORNERS, EDGES, SOLVED, Cube, InvalidCube, verify
+from support import random_cube
+
+
+def moved(state, facelets, to):
+    """
+    State with the colors of the facelets put on the facelets to
+    """
+    state = list(state)
+    colors = [state[i] for i in facelets]
+    for i, c in zip(to, colors):
+        state[i] = c
+    return tuple(state)
+
+
+class VerifyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.state = random_cube(1).state
+
+    def check(self, state, message):
+        with self.assertRaises(InvalidCube) as raised:
+            verify(state)
+        self.assertIn(message, str(raised.exception))
+        cube = Cube()
+        cube.state = state
+        self.assertRaises(InvalidCube, cube.solve)
+
+    def test_valid(self):
+        verify(self.state)
+        verify(SOLVED)
+
+    def test_twisted_corner(self):
+        a, b, c = CORNERS['FUR']
+        self.check(moved(self.state, (a, b, c), (b, c, a)), 'twisted')
+
+    def test_flipped_edge(self):
+        a, b = EDGES['FU']
+        self.check(moved(self.state, (a, b), (b, a)), 'flipped')
+
+    def test_parity(self):
+        # two edges swapped
+        self.check(moved(self.state, EDGES['FU'] + EDGES['FL'], EDGES['FL'] + EDGES['FU']), 'swapped')
+
+    def test_center(self):
+        self.check(moved(self.state, (4, 13), (13, 4)), 'center')
+
+    def test_colors(self):
+        self.check(self.state[:53] + ((self.state[53] + 1) % 6,), '9 facelets')
+        self.check(self.state[:53], '54 facelets')
+
+
+if __name__ == '__main__':
+    unittest.main()